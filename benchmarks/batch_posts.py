@@ -0,0 +1,70 @@
+"""Throughput of POST /posts/batch against the single-post path.
+
+Usage: python -m benchmarks.batch_posts --author-id UUID --category-id N
+       [--posts 500] [--tags 3]
+
+Needs a migrated database configured through the usual DB_* variables.
+Both paths are called at the service layer, without media, so the numbers
+cover the database work only. Created posts are left in place.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from src.app.post import create_post_fully, create_posts_batch
+from src.app.schemas import BatchPostDTO, CreatePostDTO
+from src.infrastructure.database.factory import dispose_engine, get_sessionmaker
+
+
+def make_posts(count: int, category_id: int, tags: int) -> list[BatchPostDTO]:
+    return [
+        BatchPostDTO(
+            text=f"benchmark post {i}",
+            category_id=category_id,
+            tags=[f"bench-{(i + j) % 50}" for j in range(tags)],
+        )
+        for i in range(count)
+    ]
+
+
+async def single(posts: list[BatchPostDTO], author_id: uuid.UUID) -> float:
+    start = time.perf_counter()
+    for post in posts:
+        async with get_sessionmaker()() as session:
+            await create_post_fully(
+                CreatePostDTO(text=post.text, category_id=post.category_id),
+                author_id, session, [], post.tags,
+            )
+    return time.perf_counter() - start
+
+
+async def batch(posts: list[BatchPostDTO], author_id: uuid.UUID) -> float:
+    start = time.perf_counter()
+    async with get_sessionmaker()() as session:
+        await create_posts_batch(posts, author_id, session)
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    posts = make_posts(args.posts, args.category_id, args.tags)
+    for name, fn in (("single", single), ("batch", batch)):
+        elapsed = await fn(posts, args.author_id)
+        print(f"{name:>6}: {elapsed:7.2f} s, {len(posts) / elapsed:9.1f} posts/s")
+    await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--author-id", type=uuid.UUID, required=True)
+    parser.add_argument("--category-id", type=int, required=True)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=3)
+    load_dotenv()
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time to delete many posts with their media through PostRepo.delete_posts.
+
+Usage: python -m benchmarks.bulk_delete [--posts 100000] [--media-per-post 2]
+       [--distinct-blobs 20000]
+
+Needs a migrated database configured through the usual DB_* variables.
+One author is seeded with --posts posts and their media rows, which share
+--distinct-blobs blobs. The author's posts are then deleted in one call.
+Everything runs in a transaction that is rolled back, so neither the
+database nor S3 is changed. The number of keys queued for the sweeper is
+printed. The sweeper sends those keys to S3 in batches of 1000, one
+DeleteObjects request per batch.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.database.factory import dispose_engine, get_engine
+from src.infrastructure.database.models import Post
+from src.infrastructure.database.repo import PostRepo
+
+AUTHOR = uuid.UUID("00000000-0000-7000-8000-000000000002")
+
+SEED = [
+    """INSERT INTO author (id, username, name, email, hashed_password)
+       VALUES (:author, 'bench_delete', 'bench_delete', 'bench-delete@example.com', '-')""",
+    """INSERT INTO category (id, name) VALUES (-2, 'bench delete')""",
+    """INSERT INTO blob (hash, size, ref_count)
+       SELECT encode(sha256(('blob' || i)::bytea), 'hex'), 1024, 0
+       FROM generate_series(1, :blobs) AS i""",
+    """INSERT INTO post (id, text, date_created, author_id, category_id)
+       SELECT (lpad(to_hex(extract(epoch FROM now())::bigint - :posts + i), 9, '0')
+               || '0007' || substr(md5('p' || i), 1, 19))::uuid,
+              'benchmark', now(), :author, -2
+       FROM generate_series(1, :posts) AS i""",
+    """INSERT INTO media (id, media_type, post_id, blob_hash)
+       SELECT md5(p.id::text || m)::uuid, '.png', p.id,
+              encode(sha256(('blob' || (1 + abs(hashtext(p.id::text || m)) % :blobs))::bytea), 'hex')
+       FROM post p, generate_series(1, :media) AS m
+       WHERE p.author_id = :author""",
+    """UPDATE blob SET ref_count = c.n
+       FROM (SELECT blob_hash, count(*) AS n FROM media GROUP BY blob_hash) AS c
+       WHERE blob.hash = c.blob_hash""",
+]
+
+
+async def run(args: argparse.Namespace) -> None:
+    params = {
+        "author": AUTHOR, "posts": args.posts,
+        "media": args.media_per_post, "blobs": args.distinct_blobs,
+    }
+    async with get_engine().connect() as conn:
+        trans = await conn.begin()
+        try:
+            for stmt in SEED:
+                await conn.execute(text(stmt), params)
+            session = AsyncSession(bind=conn)
+            started = time.perf_counter()
+            deleted = await PostRepo(session).delete_posts(Post.author_id == AUTHOR)
+            elapsed = time.perf_counter() - started
+            queued = (await conn.execute(text(
+                "SELECT count(*) FROM media_deletion"
+            ))).scalar_one()
+            print(f"deleted {deleted} posts in {elapsed:.2f} s "
+                  f"({deleted / elapsed:.0f} posts/s), {queued} keys queued")
+        finally:
+            await trans.rollback()
+    await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--media-per-post", type=int, default=2)
+    parser.add_argument("--distinct-blobs", type=int, default=20_000)
+    load_dotenv()
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
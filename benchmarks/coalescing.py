@@ -0,0 +1,64 @@
+"""Backend calls made by concurrent identical reads, with and without coalescing.
+
+Usage: python -m benchmarks.coalescing [--requests 500] [--latency 0.02]
+
+Runs offline: the backend is a sleep standing in for a post query or an S3
+get_object. Half of the coalesced callers of the last run are cancelled
+midway, as disconnecting clients would be, to show the others still get
+the result of the single shared call.
+"""
+import argparse
+import asyncio
+import time
+
+from src.app.singleflight import SingleFlight
+
+
+class Backend:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    async def fetch(self) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return b"post"
+
+
+async def run(requests: int, latency: float) -> None:
+    backend = Backend(latency)
+    start = time.perf_counter()
+    await asyncio.gather(*(backend.fetch() for _ in range(requests)))
+    print(f"direct     {backend.calls:5} backend calls  "
+          f"{(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    backend = Backend(latency)
+    flights = SingleFlight()
+    start = time.perf_counter()
+    await asyncio.gather(*(flights.do("post", backend.fetch) for _ in range(requests)))
+    print(f"coalesced  {backend.calls:5} backend calls  "
+          f"{(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    backend = Backend(latency)
+    flights = SingleFlight()
+    tasks = [asyncio.create_task(flights.do("post", backend.fetch))
+             for _ in range(requests)]
+    await asyncio.sleep(latency / 2)
+    for task in tasks[::2]:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    served = sum(result == b"post" for result in results)
+    print(f"cancelled  {backend.calls:5} backend calls  "
+          f"{served} of {requests} callers served")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
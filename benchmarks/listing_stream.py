@@ -0,0 +1,135 @@
+"""Peak memory and bytes on the wire of a large category listing.
+
+Usage: python -m benchmarks.listing_stream [--posts 1000000]
+
+Needs a migrated Postgres database configured through the usual DB_* variables.
+A scratch author and category are created and --posts posts are inserted
+into the category, then GET /posts/{category_id} is called through the ASGI
+app: once building the whole list, then with ?stream=true without
+compression, with gzip and, when zstandard is installed, with zstd. The
+response is counted as it is sent, not kept. Peak memory is the tracemalloc
+peak of the request, so only Python allocations are included. The scratch
+rows are deleted afterwards.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from benchmarks.partitioned_reads import UUID7_SQL
+from src.infrastructure.database.factory import dispose_engine, get_engine
+from src.presentation.main import main as create_app
+from src.presentation.streaming import zstandard
+
+SEED = f"""
+INSERT INTO post (id, text, date_created, author_id, category_id)
+SELECT {UUID7_SQL}, 'benchmark', now(), :author_id, :category_id
+FROM (
+    SELECT i, extract(epoch FROM now())::bigint AS sec
+    FROM generate_series(1, :posts) AS i
+) AS s
+"""
+
+
+async def get(app, path: str, query: str, encoding: str | None) -> tuple[int, int]:
+    """Status and body bytes of a GET, the body is counted and dropped"""
+    headers = [(b"host", b"bench")]
+    if encoding is not None:
+        headers.append((b"accept-encoding", encoding.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": query.encode(), "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status = 0
+    size = 0
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # the client stays connected until the response is complete
+            await asyncio.Future()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, size
+
+
+async def seed(posts: int) -> tuple[uuid.UUID, int]:
+    author_id = uuid.uuid4()
+    category_id = int(author_id.hex[:7], 16) + 1_000_000
+    async with get_engine().begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO author (id, username, name, email, hashed_password) "
+            "VALUES (:id, :username, 'benchmark', :email, '')"
+        ), {"id": author_id, "username": f"bench{author_id.hex[:8]}",
+            "email": f"{author_id.hex}@example.com"})
+        await conn.execute(text(
+            "INSERT INTO category (id, name) VALUES (:id, :name)"
+        ), {"id": category_id, "name": f"bench-{author_id.hex[:8]}"})
+        started = time.perf_counter()
+        await conn.execute(text(SEED), {
+            "author_id": author_id, "category_id": category_id, "posts": posts
+        })
+        await conn.execute(text("ANALYZE post"))
+    print(f"seeded {posts} posts in {time.perf_counter() - started:.1f} s")
+    return author_id, category_id
+
+
+async def cleanup(author_id: uuid.UUID, category_id: int) -> None:
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("DELETE FROM post WHERE category_id = :id"), {"id": category_id}
+        )
+        await conn.execute(text("DELETE FROM category WHERE id = :id"), {"id": category_id})
+        await conn.execute(text("DELETE FROM author WHERE id = :id"), {"id": author_id})
+
+
+async def run(posts: int) -> None:
+    app = create_app()
+    author_id, category_id = await seed(posts)
+    modes = [("list", "", None), ("stream", "stream=true", None),
+             ("stream gzip", "stream=true", "gzip")]
+    if zstandard is not None:
+        modes.append(("stream zstd", "stream=true", "zstd"))
+    try:
+        print(f"{'mode':12} {'status':>6} {'wire bytes':>12} "
+              f"{'peak MiB':>9} {'seconds':>8}")
+        for name, query, encoding in modes:
+            tracemalloc.start()
+            started = time.perf_counter()
+            status, size = await get(app, f"/posts/{category_id}", query, encoding)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:12} {status:>6} {size:>12} "
+                  f"{peak / 2 ** 20:>9.1f} {elapsed:>8.2f}")
+    finally:
+        await cleanup(author_id, category_id)
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(run(args.posts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Recent-post reads on a partitioned versus a plain post table.
+
+Usage: python -m benchmarks.partitioned_reads [--rows 20000000] [--months 36]
+       [--days 7] [--runs 20] [--keep]
+
+Needs a Postgres database configured through the usual DB_* variables.
+Two scratch tables are created and seeded with the same rows, spread
+evenly over the last --months months: bench_post_flat and bench_post_part,
+partitioned monthly by uuid7 id like post. Both get an index on
+category_id. The script then times the category listing used by
+GET /posts/{category_id}?since=..., limited to the last --days days.
+The tables are dropped afterwards unless --keep is given.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src.app.uuid7 import uuid7_lower_bound
+from src.infrastructure.database.factory import dispose_engine, get_engine
+from src.infrastructure.database.partitions import (
+    add_months, months_between, partition_ddl)
+
+# 36 bits of unix seconds, 12 bits of sub-second, version 7, random tail
+UUID7_SQL = """(
+    lpad(to_hex(s.sec), 9, '0') || lpad(to_hex(s.i % 4096), 3, '0') || '7'
+    || substr(md5(s.i::text), 1, 19)
+)::uuid"""
+
+SEED = f"""
+INSERT INTO {{table}} (id, category_id, author_id, text)
+SELECT {UUID7_SQL}, s.i % 50, md5((s.i % 10000)::text)::uuid, 'benchmark'
+FROM (
+    SELECT i, :start + (i * :span / :rows) AS sec
+    FROM generate_series(1, :rows) AS i
+) AS s
+"""
+
+COLUMNS = "(id UUID PRIMARY KEY, category_id INT, author_id UUID, text VARCHAR)"
+
+QUERY = "SELECT id FROM {table} WHERE category_id = :category AND id >= :since"
+
+
+async def setup(conn, rows: int, months: int) -> None:
+    now = datetime.now(tz=timezone.utc)
+    first = add_months(now.date(), -months)
+    start = int(datetime(first.year, first.month, 1, tzinfo=timezone.utc).timestamp())
+    params = {"start": start, "span": int(now.timestamp()) - start, "rows": rows}
+
+    await conn.execute(text(f"CREATE TABLE bench_post_flat {COLUMNS}"))
+    await conn.execute(text(
+        f"CREATE TABLE bench_post_part {COLUMNS} PARTITION BY RANGE (id)"
+    ))
+    for month in months_between(first, add_months(now.date(), 1)):
+        await conn.execute(text(partition_ddl("bench_post_part", month)))
+    for table in ("bench_post_flat", "bench_post_part"):
+        started = time.perf_counter()
+        await conn.execute(text(SEED.format(table=table)), params)
+        await conn.execute(text(
+            f"CREATE INDEX ON {table} (category_id)"
+        ))
+        await conn.execute(text(f"ANALYZE {table}"))
+        print(f"seeded {table} in {time.perf_counter() - started:.1f} s")
+
+
+async def measure(conn, table: str, since, runs: int) -> list[float]:
+    query = text(QUERY.format(table=table))
+    samples = []
+    for run in range(runs):
+        started = time.perf_counter()
+        res = await conn.execute(query, {"category": run % 50, "since": since})
+        res.all()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await setup(conn, args.rows, args.months)
+    since = uuid7_lower_bound(datetime.now(tz=timezone.utc) - timedelta(days=args.days))
+    try:
+        async with engine.connect() as conn:
+            for table in ("bench_post_flat", "bench_post_part"):
+                samples = sorted(await measure(conn, table, since, args.runs))
+                print(
+                    f"{table}: median {statistics.median(samples) * 1000:.2f} ms, "
+                    f"p95 {samples[int(len(samples) * 0.95) - 1] * 1000:.2f} ms"
+                )
+            plan = await conn.execute(
+                text("EXPLAIN " + QUERY.format(table="bench_post_part")),
+                {"category": 1, "since": since},
+            )
+            print("\n".join(row[0] for row in plan))
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP TABLE bench_post_flat, bench_post_part"))
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true")
+    load_dotenv()
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
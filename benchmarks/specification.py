@@ -0,0 +1,73 @@
+"""Per-query statement overhead before and after specification caching.
+
+Usage: python -m benchmarks.specification [--iterations 20000]
+
+Runs offline (no database). For every query it times what happens before
+the driver is called: building the select and generating the cache key
+SQLAlchemy uses to look up the compiled SQL. A full compile is timed too,
+as the cost of a miss in SQLAlchemy's compiled cache.
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.app.specification import FieldSpecification, IDSpecification, InSpecification
+from src.infrastructure.database.models import Author, Post
+from src.infrastructure.database.repo import select_by
+
+
+def per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    dialect = postgresql.dialect()
+    author_id = uuid.uuid4()
+
+    def old_author():
+        query = select(Author).filter_by(id=author_id)
+        query._generate_cache_key()
+
+    def new_author():
+        query, _ = select_by(Author, IDSpecification(author_id))
+        query._generate_cache_key()
+
+    def old_posts():
+        query = select(Post.id).where(
+            (Post.category_id == 1) | Post.author_id.in_([author_id])
+        )
+        query._generate_cache_key()
+
+    def new_posts():
+        spec = FieldSpecification("category_id", 1) | InSpecification(
+            "author_id", [author_id]
+        )
+        query, _ = select_by(Post, spec, Post.id)
+        query._generate_cache_key()
+
+    def full_compile():
+        select(Author).filter_by(id=author_id).compile(dialect=dialect)
+
+    rows = [
+        ("author by id, filter_by", old_author),
+        ("author by id, select_by", new_author),
+        ("posts category|author, select()", old_posts),
+        ("posts category|author, select_by", new_posts),
+        ("full compile (cache miss)", full_compile),
+    ]
+    for name, fn in rows:
+        fn()
+        print(f"{name:<36} {per_call(fn, args.iterations):8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
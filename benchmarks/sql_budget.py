@@ -0,0 +1,289 @@
+"""Per-route SQL budget check with an N+1 report.
+
+Usage: python -m benchmarks.sql_budget [--budget benchmarks/sql_budget.json]
+       [--update]
+
+Needs a migrated Postgres database configured through the usual DB_* variables.
+The app runs with its lifespan and requests wait until its caches are warm.
+The media routes are left out when the S3 bucket cannot be reached by then.
+The script seeds its own author, category, tags and posts through the API,
+then calls every route of author_router and post_router once through the
+ASGI app (except the never-ending /posts/stream). Engine events count the
+statements, rows and bytes fetched from the database by each request;
+bytes are the sizes of the fetched values, as text for non-string values.
+The counts are compared with the budget file and the exit status is 1 when
+any budget is exceeded; tests/test_sql_budget.py runs the same check.
+Statement shapes executed more than once within one request are listed as
+N+1 suspects. --update rewrites the budget file from this run, with
+headroom on rows and bytes.
+
+The seeded rows are removed at the end, by the API where it can and by SQL
+for the category and tags.
+"""
+import argparse
+import asyncio
+import json
+import math
+import pathlib
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import delete, event
+from sqlalchemy.engine import Engine
+
+from src.app.tag import tag_index
+from src.infrastructure.database.factory import dispose_engine, get_sessionmaker
+from src.infrastructure.database.models import Category, Tag
+from src.presentation.main import main as create_app
+
+BUDGET_FILE = pathlib.Path(__file__).with_name("sql_budget.json")
+HEADROOM = 1.1
+SEED_POSTS = 50
+SEED_TAGS = 5
+WARM_UP_TIMEOUT = 10.0
+
+
+@dataclass
+class Usage:
+    statements: int = 0
+    rows: int = 0
+    bytes: int = 0
+    shapes: Counter = field(default_factory=Counter)
+
+    def counts(self) -> dict[str, int]:
+        return {"statements": self.statements, "rows": self.rows, "bytes": self.bytes}
+
+
+current_usage: ContextVar[Usage | None] = ContextVar("current_usage", default=None)
+
+
+def shape(statement: str) -> str:
+    """Statement with its parameters and expanded IN lists folded"""
+    statement = re.sub(r"\$\d+(::\w+(\[\])?)?", "?", statement)
+    statement = re.sub(r"\?(, \?)+", "?", statement)
+    return " ".join(statement.split())
+
+
+def value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value).encode())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    usage = current_usage.get()
+    if usage is None:
+        return
+    usage.statements += 1
+    # the asyncpg adapter buffers a result before it is fetched
+    rows = getattr(cursor, "_rows", None) or ()
+    usage.rows += len(rows)
+    usage.bytes += sum(value_size(value) for row in rows for value in row)
+    usage.shapes[shape(statement)] += 1
+
+
+class Runner:
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+        self.usage: dict[str, Usage] = {}
+        self.headers: dict[str, str] = {}
+
+    async def call(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        usage = Usage()
+        token = current_usage.set(usage)
+        try:
+            response = await self.client.request(
+                method, url, headers=self.headers, **kwargs
+            )
+        finally:
+            current_usage.reset(token)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {response.status_code} {response.text}")
+        self.usage[name] = usage
+        return response
+
+
+async def exercise(runner: Runner, run: str, skip_s3: bool) -> tuple[int, list[str]]:
+    username = f"budget{run}"
+    author = {
+        "username": username,
+        "email": f"{username}@example.com",
+        "name": "budget author",
+        "password": "budget-password",
+    }
+    response = await runner.call("POST /authors", "POST", "/authors", json=author)
+    author_id = response.json()["id"]
+    await runner.call(
+        "GET /authors/availability", "GET", "/authors/availability",
+        params={"username": username, "email": author["email"]}
+    )
+    response = await runner.call(
+        "POST /authors/login", "POST", "/authors/login",
+        data={"username": username, "password": author["password"]}
+    )
+    runner.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    category_id = int(run, 16) % 1_000_000_000 + 1_000_000
+    tags = [f"{run}-tag{i}" for i in range(SEED_TAGS)]
+    await runner.call(
+        "POST /posts/category", "POST", "/posts/category",
+        json={"id": category_id, "name": f"budget-{run}"}
+    )
+    await runner.call("GET /posts/categories", "GET", "/posts/categories")
+    posts = [
+        {"text": f"budget post {i}", "category_id": category_id,
+         "tags": tags[i % SEED_TAGS:i % SEED_TAGS + 2]}
+        for i in range(SEED_POSTS)
+    ]
+    response = await runner.call("POST /posts/batch", "POST", "/posts/batch", json=posts)
+    post_ids = response.json()
+    post_id = post_ids[0]
+
+    if not skip_s3:
+        response = await runner.call(
+            "POST /posts", "POST", "/posts",
+            data={"post": json.dumps({"text": "budget media post",
+                                      "category_id": category_id})},
+            files=[("media", ("budget.txt", run.encode(), "text/plain"))],
+            params={"tags": tags[:3]}
+        )
+        post_id = response.json()
+        response = await runner.call("GET /posts", "GET", "/posts",
+                                     params={"post_id": post_id})
+        await runner.call("GET /posts/media/{id}", "GET",
+                          f"/posts/media/{response.json()['medias'][0]}")
+    else:
+        await runner.call("GET /posts", "GET", "/posts", params={"post_id": post_id})
+
+    await runner.call("GET /posts/batch", "GET", "/posts/batch",
+                      params={"ids": post_ids[:20]})
+    await runner.call("GET /posts/{category_id}", "GET", f"/posts/{category_id}")
+    await runner.call("GET /posts/tag/{tag_name}", "GET", f"/posts/tag/{tags[0]}")
+    await runner.call("GET /posts/tags", "GET", "/posts/tags",
+                      params={"tags": ",".join(tags[:2])})
+    await runner.call("GET /posts/{post_id}/related", "GET",
+                      f"/posts/{post_ids[0]}/related")
+    await runner.call("GET /posts/media/stats", "GET", "/posts/media/stats")
+    await runner.call("GET /authors/{author_id}/summary", "GET",
+                      f"/authors/{author_id}/summary")
+    await runner.call("DELETE /posts", "DELETE", "/posts", json=post_ids[:10])
+    await runner.call("DELETE /authors/me", "DELETE", "/authors/me")
+    return category_id, tags
+
+
+async def cleanup(category_id: int, tags: list[str]) -> None:
+    async with get_sessionmaker()() as session:
+        await session.execute(delete(Tag).where(Tag.name.in_(tags)))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.commit()
+
+
+async def warm_up(app) -> bool:
+    """Wait for the lifespan warm-ups and the tag index, True when S3 is up"""
+    components = app.state.readiness.components
+    deadline = time.monotonic() + WARM_UP_TIMEOUT
+    while not (components and all(components.values()) and tag_index.ready):
+        if time.monotonic() > deadline:
+            cold = [name for name, ready in components.items()
+                    if not ready and name != "s3"]
+            if cold or not tag_index.ready:
+                raise RuntimeError(f"not warm after {WARM_UP_TIMEOUT}s: {cold}")
+            return False
+        await asyncio.sleep(0.1)
+    return True
+
+
+async def measure() -> dict[str, Usage]:
+    app = create_app()
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    transport = httpx.ASGITransport(app=app)
+    run = uuid.uuid4().hex[:8]
+    try:
+        async with app.router.lifespan_context(app):
+            s3_ready = await warm_up(app)
+            async with httpx.AsyncClient(
+                    transport=transport, base_url="http://budget") as client:
+                runner = Runner(client)
+                category_id, tags = await exercise(runner, run, not s3_ready)
+            await cleanup(category_id, tags)
+    finally:
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+        await dispose_engine()
+    return runner.usage
+
+
+def compare(usage: dict[str, Usage], budget: dict[str, dict[str, int]]) -> list[str]:
+    """Print the usage against the budget, returns the exceeded limits"""
+    exceeded = []
+    print(f"{'route':32} {'statements':>12} {'rows':>12} {'bytes':>14}")
+    for name, observed in usage.items():
+        limits = budget.get(name)
+        cells = []
+        for metric, value in observed.counts().items():
+            limit = None if limits is None else limits.get(metric)
+            over = limit is not None and value > limit
+            if over:
+                exceeded.append(f"{name} {metric}: {value} > {limit}")
+            cells.append(f"{value}/{'-' if limit is None else limit}{'!' if over else ''}")
+        print(f"{name:32} {cells[0]:>12} {cells[1]:>12} {cells[2]:>14}")
+        if limits is None:
+            print(f"    no budget for {name}")
+    return exceeded
+
+
+def report_repeats(usage: dict[str, Usage]) -> None:
+    print("\nrepeated statement shapes (N+1 suspects)")
+    found = False
+    for name, observed in usage.items():
+        for statement, times in observed.shapes.most_common():
+            if times < 2:
+                break
+            found = True
+            print(f"{name}: {times}x {statement[:160]}")
+    if not found:
+        print("none")
+
+
+def with_headroom(usage: dict[str, Usage]) -> dict[str, dict[str, int]]:
+    return {
+        name: {
+            "statements": observed.statements,
+            "rows": math.ceil(observed.rows * HEADROOM),
+            "bytes": math.ceil(observed.bytes * HEADROOM),
+        }
+        for name, observed in usage.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=pathlib.Path, default=BUDGET_FILE)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+    load_dotenv()
+    usage = asyncio.run(measure())
+    report_repeats(usage)
+    print()
+    if args.update:
+        budget = json.loads(args.budget.read_text()) if args.budget.exists() else {}
+        budget.update(with_headroom(usage))
+        args.budget.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"budget written to {args.budget}")
+        return
+    budget = json.loads(args.budget.read_text())
+    if compare(usage, budget):
+        print("\nSQL budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
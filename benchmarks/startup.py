@@ -0,0 +1,67 @@
+"""Import-time and startup benchmark.
+
+Usage: python -m benchmarks.startup [--runs 10] [--ready-timeout 30]
+
+Measures, in fresh interpreters, how long importing the app module takes,
+how long it takes until the app can answer liveness probes and how long
+until the database and S3 warm-ups report ready.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+from src.presentation.main import main
+imported = time.perf_counter()
+
+async def probe():
+    app = main()
+    async with app.router.lifespan_context(app):
+        live = time.perf_counter()
+        deadline = live + float(sys.argv[1])
+        while not app.state.readiness.ready and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        ready = time.perf_counter() if app.state.readiness.ready else None
+    return live, ready
+
+live, ready = asyncio.run(probe())
+print(json.dumps({
+    "import": imported - start,
+    "live": live - start,
+    "ready": None if ready is None else ready - start,
+}))
+"""
+
+
+def run_once(ready_timeout: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, str(ready_timeout)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--ready-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    samples = [run_once(args.ready_timeout) for _ in range(args.runs)]
+    for key in ("import", "live", "ready"):
+        values = [s[key] for s in samples if s[key] is not None]
+        if not values:
+            print(f"{key:>6}: never reached")
+            continue
+        print(
+            f"{key:>6}: median {statistics.median(values) * 1000:.1f} ms, "
+            f"max {max(values) * 1000:.1f} ms ({len(values)}/{len(samples)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
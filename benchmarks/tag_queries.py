@@ -0,0 +1,92 @@
+"""Latency of multi-tag post queries on a large seeded dataset.
+
+Usage: python -m benchmarks.tag_queries [--posts 2000000] [--tags 5000]
+       [--tags-per-post 5] [--runs 50]
+
+Needs a migrated database configured through the usual DB_* variables.
+Everything is seeded inside one transaction that is rolled back at the
+end, so the database is left as it was. Tag popularity follows a rough
+power law, so some three-tag intersections are large and some are tiny.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.database.factory import dispose_engine, get_engine
+from src.infrastructure.database.repo import PostRepo
+
+SEED = [
+    """INSERT INTO author (id, username, name, email, hashed_password)
+       VALUES ('00000000-0000-7000-8000-000000000001', 'bench_author',
+               'bench_author', 'bench@example.com', '-')""",
+    """INSERT INTO category (id, name) VALUES (-1, 'bench category')""",
+    """INSERT INTO tag (id, name)
+       SELECT md5('tag' || i)::uuid, 'bench-' || i
+       FROM generate_series(1, :tags) AS i""",
+    """INSERT INTO post (id, text, date_created, author_id, category_id)
+       SELECT (lpad(to_hex(extract(epoch FROM now())::bigint - :posts + i), 9, '0')
+               || '0007' || substr(md5(i::text), 1, 19))::uuid,
+              'benchmark', now(), '00000000-0000-7000-8000-000000000001', -1
+       FROM generate_series(1, :posts) AS i""",
+    """INSERT INTO post_tag (post_id, tag_id)
+       SELECT DISTINCT p.id,
+              md5('tag' || (1 + floor(:tags * power(random(), 3)))::int)::uuid
+       FROM post p, generate_series(1, :per_post)
+       WHERE p.category_id = -1
+       ON CONFLICT DO NOTHING""",
+    "ANALYZE post_tag",
+]
+
+
+async def run(args: argparse.Namespace) -> None:
+    params = {"tags": args.tags, "posts": args.posts, "per_post": args.tags_per_post}
+    async with get_engine().connect() as conn:
+        trans = await conn.begin()
+        try:
+            for stmt in SEED:
+                started = time.perf_counter()
+                await conn.execute(text(stmt), params)
+                print(f"{stmt.split()[0]} ... {time.perf_counter() - started:.1f} s")
+            ids = [
+                row[0] for row in await conn.execute(text(
+                    "SELECT id FROM tag WHERE name LIKE 'bench-%' ORDER BY name"
+                ))
+            ]
+            repo = PostRepo(AsyncSession(bind=conn))
+            rng = random.Random(0)
+            for match_all in (True, False):
+                samples = []
+                for _ in range(args.runs):
+                    tags = rng.sample(ids[: max(3, len(ids) // 20)], 3)
+                    started = time.perf_counter()
+                    await repo.get_posts_by_tags(tags, match_all, [], None, 50)
+                    samples.append(time.perf_counter() - started)
+                samples.sort()
+                print(
+                    f"3 tags, mode={'all' if match_all else 'any'}: "
+                    f"median {statistics.median(samples) * 1000:.2f} ms, "
+                    f"p95 {samples[int(len(samples) * 0.95) - 1] * 1000:.2f} ms"
+                )
+        finally:
+            await trans.rollback()
+    await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=2_000_000)
+    parser.add_argument("--tags", type=int, default=5000)
+    parser.add_argument("--tags-per-post", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=50)
+    load_dotenv()
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
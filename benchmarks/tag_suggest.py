@@ -0,0 +1,49 @@
+"""Tag suggestion latency of the in-memory prefix index.
+
+Usage: python -m benchmarks.tag_suggest [--tags 1000000] [--queries 20000]
+
+Runs offline over random tag names with heavy-tailed post counts. Prints
+the index build time and the latency percentiles of prefixes of 1 to 6
+characters taken from existing names.
+"""
+import argparse
+import random
+import string
+import time
+
+from src.app.tag import TagIndex, _build
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tags", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+    rnd = random.Random(0)
+    counts = {}
+    while len(counts) < args.tags:
+        name = "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 15)))
+        counts[name] = int(rnd.paretovariate(1.2))
+
+    start = time.perf_counter()
+    index = TagIndex()
+    index.names, index.top = _build(counts)
+    index.counts, index.ready = counts, True
+    print(f"build {time.perf_counter() - start:.2f} s, "
+          f"{len(index.top)} prefixes with a precomputed top")
+
+    timings = []
+    for _ in range(args.queries):
+        name = rnd.choice(index.names)
+        prefix = name[:rnd.randint(1, 6)]
+        start = time.perf_counter()
+        index.suggest(prefix, 10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    for label, q in (("p50", 0.5), ("p99", 0.99), ("max", 1.0)):
+        value = timings[min(len(timings) - 1, int(len(timings) * q))]
+        print(f"{label} {value * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
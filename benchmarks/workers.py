@@ -0,0 +1,89 @@
+"""Request throughput of the production runner by worker count.
+
+Usage: python -m benchmarks.workers [--workers 1 2 4 8] [--path /health/live]
+       [--concurrency 64] [--duration 10] [--port 5055]
+
+Starts run_production() with WEB_WORKERS set to each value in turn,
+waits for it to answer, drives --path with --concurrency concurrent
+clients for --duration seconds and prints requests per second. It also
+prints the memory that /health/worker reports for the workers that
+answered.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVER = "from src.presentation.main import run_production; run_production()"
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/live")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(client: httpx.AsyncClient, path: str, concurrency: int, duration: float):
+    done = 0
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal done
+        while time.monotonic() < deadline:
+            await client.get(path)
+            done += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done / duration
+
+
+async def measure(args: argparse.Namespace, workers: int) -> None:
+    # the server refuses worker counts its connection budget cannot hold
+    budget = max(workers * 2, int(os.environ.get("DB_POOL_BUDGET", 15)))
+    env = {**os.environ, "WEB_WORKERS": str(workers), "WEB_PORT": str(args.port),
+           "DB_POOL_BUDGET": str(budget)}
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{args.port}", limits=limits) as client:
+            await wait_until_up(client)
+            rate = await drive(client, args.path, args.concurrency, args.duration)
+            memory = {}
+            for _ in range(workers * 4):
+                info = (await client.get("/health/worker")).json()
+                memory[info["pid"]] = info["rss"]
+        rss = sum(memory.values()) / len(memory) / 2 ** 20
+        print(f"{workers:>3} workers: {rate:9.1f} req/s, ~{rss:.0f} MiB rss per worker")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--path", default="/health/live")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+    for workers in args.workers:
+        asyncio.run(measure(args, workers))
+
+
+if __name__ == "__main__":
+    main()
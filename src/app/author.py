@@ -1,34 +1,79 @@
-import os
+import asyncio
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from dotenv import load_dotenv
 from email_validator import EmailNotValidError, validate_email
 from fastapi import Depends, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.exc import IntegrityError
 
+from src.app.bloom import BloomFilter
+from src.app.config import get_auth_config
 from src.app.hash_password import bcrypt_context, hash_password
 from src.app.specification import (
     EmailSpecification,
     IDSpecification,
     UsernameSpecification,
 )
-from src.app.uuid7 import uuid7
+from src.app.uuid7 import uuid7, uuid7_datetime
 from src.app.exceptions import UnAuthorizedError
-from src.app.schemas import UTC_6, AuthorCreateDTO, AuthorDTO, AuthorOutDTO
-from src.infrastructure.database.repo import AuthorRepo
-
-load_dotenv()
+from src.app.schemas import (
+    UTC_6, AuthorCreateDTO, AuthorDTO, AuthorOutDTO, AvailabilityDTO,
+    AuthorSummaryDTO, CategoryCountDTO, TagCountDTO)
+from src.infrastructure.database.notifications import AUTHOR_CREATED, notify
+from src.infrastructure.database.repo import AuthorRepo, AuthorStatsRepo
 
 JWT_EXPIRES = timedelta(minutes=60)
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="authors/login")
 
+MIN_FILTER_CAPACITY = 100_000
+
+
+class LoginFilter:
+    """Usernames and emails already taken, answers "maybe" until loaded.
+
+    Signups through any worker reach ``add`` through the author_created
+    notification, ``load`` rebuilds the filter now and then and keeps
+    answering from the previous one meanwhile.
+    """
+
+    def __init__(self) -> None:
+        self._bloom: BloomFilter | None = None
+        # filter being rebuilt by load, it gets the adds made meanwhile
+        self._loading: BloomFilter | None = None
+        self.ready = False
+
+    def add(self, username: str, email: str) -> None:
+        for bloom in (self._bloom, self._loading):
+            if bloom is not None:
+                bloom.add("username:" + username)
+                bloom.add("email:" + email)
+
+    def might_contain(self, field: str, value: str) -> bool:
+        if not self.ready:
+            return True
+        return f"{field}:{value}" in self._bloom
+
+    async def load(self, repo: AuthorRepo) -> None:
+        count = await repo.count_authors()
+        self._loading = BloomFilter(max(count * 2, MIN_FILTER_CAPACITY))
+        try:
+            async for username, email in repo.stream_logins():
+                self._loading.add("username:" + username)
+                self._loading.add("email:" + email)
+            self._bloom = self._loading
+        finally:
+            self._loading = None
+        self.ready = True
+
+
+login_filter = LoginFilter()
+
 
 async def _get_author(repo: AuthorRepo, user_id: uuid.UUID) -> AuthorOutDTO:
     user = await repo.get_author(IDSpecification(user_id))
@@ -38,6 +83,80 @@ async def _get_author(repo: AuthorRepo, user_id: uuid.UUID) -> AuthorOutDTO:
     return AuthorOutDTO.model_validate(user)
 
 
+SUMMARY_TTL = 30.0
+SUMMARY_CACHE_SIZE = 10_000
+SUMMARY_TOP = 5
+
+
+class SummaryCache:
+    """Author summaries served recently, each kept for SUMMARY_TTL seconds.
+
+    Posts written or deleted through this worker drop their author's entry,
+    changes made through other workers show up once the entry expires.
+    """
+
+    def __init__(self, ttl: float = SUMMARY_TTL, size: int = SUMMARY_CACHE_SIZE) -> None:
+        self.ttl = ttl
+        self.size = size
+        self._entries: dict[uuid.UUID, tuple[float, AuthorSummaryDTO]] = {}
+
+    def get(self, author_id: uuid.UUID) -> AuthorSummaryDTO | None:
+        entry = self._entries.get(author_id)
+        if entry is None:
+            return None
+        expires, summary = entry
+        if expires < time.monotonic():
+            del self._entries[author_id]
+            return None
+        return summary
+
+    def put(self, author_id: uuid.UUID, summary: AuthorSummaryDTO) -> None:
+        self._entries.pop(author_id, None)
+        if len(self._entries) >= self.size:
+            # the oldest entry is the first one, dicts keep insertion order
+            del self._entries[next(iter(self._entries))]
+        self._entries[author_id] = (time.monotonic() + self.ttl, summary)
+
+    def invalidate(self, author_id: uuid.UUID) -> None:
+        self._entries.pop(author_id, None)
+
+
+author_summaries = SummaryCache()
+
+
+async def _load_author_summary(
+        repo: AuthorStatsRepo, author_id: uuid.UUID) -> AuthorSummaryDTO:
+    stats = await repo.get_stats(author_id)
+    if stats is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="USER DOES NOT EXIST")
+    username, name, posts, last_post_id = stats
+    return AuthorSummaryDTO(
+        id=author_id,
+        username=username,
+        name=name,
+        posts=posts,
+        last_post_at=uuid7_datetime(last_post_id) if last_post_id else None,
+        top_tags=[
+            TagCountDTO(name=tag, posts=count)
+            for tag, count in await repo.get_top_tags(author_id, SUMMARY_TOP)
+        ],
+        top_categories=[
+            CategoryCountDTO(id=category_id, name=category, posts=count)
+            for category_id, category, count in
+            await repo.get_top_categories(author_id, SUMMARY_TOP)
+        ],
+    )
+
+
+async def _get_author_summary(
+        repo: AuthorStatsRepo, author_id: uuid.UUID) -> AuthorSummaryDTO:
+    summary = author_summaries.get(author_id)
+    if summary is None:
+        summary = await _load_author_summary(repo, author_id)
+        author_summaries.put(author_id, summary)
+    return summary
+
+
 async def _create_author(repo: AuthorRepo, user: AuthorCreateDTO) -> AuthorOutDTO:
     if await repo.is_author_exists(user):
         raise HTTPException(
@@ -45,12 +164,58 @@ async def _create_author(repo: AuthorRepo, user: AuthorCreateDTO) -> AuthorOutDT
         )
 
     new_user = AuthorDTO(
-        id=uuid7(), hashed_password=hash_password(user.password), **user.model_dump()
+        id=uuid7(), hashed_password=await asyncio.to_thread(hash_password, user.password),
+        **user.model_dump()
     )
-    res = await repo.create_author(new_user)
+    try:
+        res = await repo.create_author(new_user)
+    except IntegrityError:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT, detail="USERNAME OR EMAIL ALREADY TAKEN"
+        )
+    # the other workers learn about the signup when this commits
+    await notify(repo.session, AUTHOR_CREATED, [
+        {"username": new_user.username, "email": new_user.email}
+    ])
+    await repo.session.commit()
+    login_filter.add(new_user.username, new_user.email)
     return AuthorOutDTO.model_validate(res)
 
 
+def publish_author_created(event: dict) -> None:
+    login_filter.add(event["username"], event["email"])
+
+
+async def _check_availability(
+        repo: AuthorRepo, username: str | None, email: str | None
+) -> AvailabilityDTO:
+    result = AvailabilityDTO()
+    if username is not None:
+        result.username = not (
+            login_filter.might_contain("username", username)
+            and await repo.is_taken(UsernameSpecification(username))
+        )
+    if email is not None:
+        # stored the way signup's EmailStr normalizes it, domain lowercased
+        try:
+            email = validate_email(email, check_deliverability=False).normalized
+        except EmailNotValidError:
+            result.email = False
+        else:
+            result.email = not (
+                login_filter.might_contain("email", email)
+                and await repo.is_taken(EmailSpecification(email))
+            )
+    return result
+
+
+async def _delete_author(repo: AuthorRepo, author_id: uuid.UUID) -> None:
+    if not await repo.delete_author(author_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="USER DOES NOT EXIST")
+    await repo.session.commit()
+    author_summaries.invalidate(author_id)
+
+
 async def check_login(login: str, repo: AuthorRepo) -> AuthorDTO | None:
     try:
         validate_email(login)
@@ -63,14 +228,15 @@ async def check_login(login: str, repo: AuthorRepo) -> AuthorDTO | None:
 
 
 def create_access_token(username: str, author_id: uuid.UUID, expires: timedelta) -> str:
+    config = get_auth_config()
     return jwt.encode(
         {
             "username": username,
             "exp": datetime.now(tz=UTC_6) + expires,
             "id": str(author_id),
         },
-        SECRET_KEY,
-        ALGORITHM,
+        config.JWT_SECRET_KEY,
+        config.ALGORITHM,
     )
 
 
@@ -78,15 +244,20 @@ async def authenticate_author(
     login: str, repo: AuthorRepo, password: str
 ) -> str:
     author = await check_login(login, repo)
-    if author is not None and bcrypt_context.verify(password, author.hashed_password):
+    # bcrypt is deliberately slow, keep it off the event loop
+    if author is not None and await asyncio.to_thread(
+            bcrypt_context.verify, password, author.hashed_password):
         return create_access_token(author.username, author.id, JWT_EXPIRES)
 
     raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="BAD CREDENTIALS")
 
 
 async def get_current_author(token: Annotated[str, Depends(oauth2_bearer)]) -> uuid.UUID:
+    config = get_auth_config()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token, config.JWT_SECRET_KEY, algorithms=[config.ALGORITHM]
+        )
         username = payload.get("username")
         author_id = payload.get("id")
         exp = payload.get("exp")
@@ -96,6 +267,6 @@ async def get_current_author(token: Annotated[str, Depends(oauth2_bearer)]) -> u
             or datetime.now(tz=UTC_6) > datetime.fromtimestamp(timestamp=exp, tz=UTC_6)
         ):
             raise JWTError()
-        return author_id
-    except JWTError:
+        return uuid.UUID(author_id)
+    except (JWTError, ValueError):
         raise UnAuthorizedError()
\ No newline at end of file
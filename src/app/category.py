@@ -0,0 +1,53 @@
+import time
+
+from src.app.schemas import CategoryDTO
+from src.infrastructure.database.repo import CategoryRepo
+
+REVALIDATE_AFTER = 5.0
+
+
+class CategoryRegistry:
+    """Process-local copy of the category table.
+
+    The copy is tagged with a version stamp (row count and max id) that is
+    re-read on a lookup miss and at most every REVALIDATE_AFTER seconds for
+    listings, so categories created by other workers show up without
+    re-reading the table on every request.
+    """
+
+    def __init__(self) -> None:
+        self.categories: dict[int, CategoryDTO] = {}
+        self.version: tuple[int, int] | None = None
+        self._checked_at = 0.0
+
+    async def load(self, repo: CategoryRepo) -> None:
+        version = await repo.get_version()
+        categories = await repo.get_categories()
+        self.categories = {
+            c.id: CategoryDTO(id=c.id, name=c.name) for c in categories
+        }
+        self.version = version
+        self._checked_at = time.monotonic()
+
+    async def revalidate(self, repo: CategoryRepo) -> None:
+        version = await repo.get_version()
+        self._checked_at = time.monotonic()
+        if version != self.version:
+            await self.load(repo)
+
+    def add(self, category: CategoryDTO) -> None:
+        self.categories[category.id] = category
+
+    async def exists(self, repo: CategoryRepo, category_id: int) -> bool:
+        if category_id in self.categories:
+            return True
+        await self.revalidate(repo)
+        return category_id in self.categories
+
+    async def list(self, repo: CategoryRepo) -> list[CategoryDTO]:
+        if time.monotonic() - self._checked_at > REVALIDATE_AFTER:
+            await self.revalidate(repo)
+        return sorted(self.categories.values(), key=lambda c: c.id)
+
+
+category_registry = CategoryRegistry()
@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class AuthConfig(BaseSettings):
+    JWT_SECRET_KEY: str
+    ALGORITHM: str
+
+    model_config = SettingsConfigDict(
+        env_file=".env.non-dev", env_file_encoding="utf-8", extra="ignore"
+    )
+
+
+@lru_cache
+def get_auth_config() -> AuthConfig:
+    return AuthConfig()
@@ -0,0 +1,57 @@
+"""Reconcile S3 objects with the media table.
+
+Usage: python -m src.app.orphans [--apply] [--grace-hours 24]
+
+Objects no row refers to are orphans. With --apply they are queued in
+media_deletion for the sweeper. Objects younger than the grace period are
+left alone, since an upload is PUT before its transaction commits. Rows
+whose object is missing are only reported.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from src.infrastructure.database.factory import dispose_engine, get_sessionmaker
+from src.infrastructure.database.repo import MediaDeletionRepo, MediaRepo
+from src.infrastructure.s3.commands import s3_list_keys
+
+
+async def reconcile(apply: bool, grace: timedelta) -> None:
+    cutoff = datetime.now(tz=timezone.utc) - grace
+    async with get_sessionmaker()() as session:
+        referenced = await MediaRepo(session).get_storage_keys()
+        queue = MediaDeletionRepo(session)
+        queued = await queue.get_keys()
+        seen = set()
+        orphans = []
+        async for key, modified in s3_list_keys():
+            seen.add(key)
+            if key not in referenced and key not in queued and modified < cutoff:
+                orphans.append(key)
+        missing = referenced - seen
+
+        print(f"objects: {len(seen)}, referenced keys: {len(referenced)}")
+        print(f"orphaned objects: {len(orphans)}, already queued: {len(queued)}")
+        print(f"rows with a missing object: {len(missing)}")
+        for key in sorted(missing):
+            print(f"  missing {key}")
+        if apply and orphans:
+            await queue.enqueue(orphans)
+            await session.commit()
+            print(f"queued {len(orphans)} orphans for deletion")
+    await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apply", action="store_true")
+    parser.add_argument("--grace-hours", type=float, default=24)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(reconcile(args.apply, timedelta(hours=args.grace_hours)))
+
+
+if __name__ == "__main__":
+    main()
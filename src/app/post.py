@@ -1,25 +1,49 @@
 import asyncio
+import hashlib
+import json
 import pathlib
 import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from typing import AsyncIterator
 
 from fastapi import UploadFile
 from fastapi.exceptions import HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
+from src.app.author import author_summaries
+from src.app.category import category_registry
+from src.app.pubsub import post_hub, post_topics
+from src.app.singleflight import SingleFlight
+from src.app.tag import tag_index
 from src.app.uuid7 import uuid7
 from src.infrastructure.database.models import Category, Post, Tag, Media
-from src.app.schemas import CategoryDTO, TagDTO, CreatePostDTO, PostDTO, PostOutDTO
-from src.infrastructure.database.repo import CategoryRepo, TagRepo, PostRepo, MediaRepo
-from src.infrastructure.s3.commands import s3_media_upload, s3_get_media
+from src.app.schemas import (
+    CategoryDTO, TagDTO, CreatePostDTO, PostDTO, PostOutDTO, DedupStatsDTO,
+    BatchPostDTO, BatchItemErrorDTO, PostPageDTO, RelatedPostDTO)
+from src.infrastructure.database.repo import (
+    CategoryRepo, TagRepo, PostRepo, MediaRepo, BlobRepo, MediaDeletionRepo,
+    IdempotencyRepo, AuthorStatsRepo)
+from src.infrastructure.database.notifications import POST_CREATED, notify
+from src.infrastructure.s3.commands import (
+    DELETE_BATCH_SIZE, s3_media_upload, s3_delete_objects, s3_get_object,
+    media_response)
 from src.app.specification import NameSpecification
 
+# concurrent reads of the same post or media share one fetch
+post_reads = SingleFlight()
+media_reads = SingleFlight()
+
 
 async def _create_post(
         repo: PostRepo,
         schema: CreatePostDTO,
         author_id: uuid.UUID,
 ) -> Post:
+    if not await category_registry.exists(
+            CategoryRepo(repo.session), schema.category_id):
+        raise HTTPException(status_code=422, detail="specified category does not exist")
     try:
         return await repo.create_post(schema, author_id)
     except IntegrityError:
@@ -40,24 +64,47 @@ async def add_tag(
 async def add_tags(post: Post, repo: TagRepo, tags: list[str] | None):
     tasks = []
     if tags is not None:
-        for tag in tags:
+        # new tags are inserted in this order, sorted like get_or_create_tags
+        for tag in sorted(set(tags)):
             tasks.append(add_tag(post, repo, tag))
         await asyncio.gather(*tasks)
 
 
 async def _create_category(repo: CategoryRepo, category: CategoryDTO):
     try:
-        return await repo.create_category(schema=category)
+        res = await repo.create_category(schema=category)
     except IntegrityError:
         raise HTTPException(status_code=422, detail='category already exists')
+    category_registry.add(category)
+    return res
+
 
+async def _get_categories(repo: CategoryRepo) -> list[CategoryDTO]:
+    return await category_registry.list(repo)
 
-async def _get_posts_by_category(repo: PostRepo, category_id: int):
-    res = await repo.get_posts_by_category(category_id)
+
+async def _get_posts_by_category(
+        repo: PostRepo, category_id: int, since: datetime | None = None):
+    res = await repo.get_posts_by_category(category_id, since)
     return [obj[0] for obj in res]
 
 
-async def _get_post(repo: PostRepo, post_id: uuid.UUID):
+async def _get_category_version(repo: PostRepo, category_id: int) -> int:
+    return await repo.get_category_version(category_id)
+
+
+async def _get_tag_version(repo: PostRepo, tag: str) -> int:
+    return await repo.get_tag_version(tag)
+
+
+async def _fetch_post(
+        repo: PostRepo, post_id: uuid.UUID
+) -> tuple[PostOutDTO, tuple[int, datetime] | None]:
+    """A post and its document's version and render time, None without one"""
+    document = await repo.get_document(post_id)
+    if document is not None:
+        document, version, updated_at = document
+        return PostOutDTO.model_validate(document), (version, updated_at)
     try:
         post = await repo.get_post(post_id)
         return PostOutDTO(
@@ -68,52 +115,354 @@ async def _get_post(repo: PostRepo, post_id: uuid.UUID):
             tags=[tag.name for tag in post.tags],
             medias=[m.id for m in post.media],
             category_id=post.category_id
-        )
+        ), None
     except NoResultFound:
         raise HTTPException(status_code=404, detail='post not found')
 
 
+async def _read_post(
+        session_factory: async_sessionmaker[AsyncSession], post_id: uuid.UUID
+) -> tuple[PostOutDTO, tuple[int, datetime] | None]:
+    # a session of the shared fetch, not of any one of the waiting requests
+    async with session_factory() as db_session:
+        return await _fetch_post(PostRepo(db_session), post_id)
+
+
+async def _get_post(
+        session_factory: async_sessionmaker[AsyncSession], post_id: uuid.UUID
+) -> tuple[PostOutDTO, tuple[int, datetime] | None]:
+    return await post_reads.do(
+        post_id, partial(_read_post, session_factory, post_id)
+    )
+
+
+async def _get_post_stamp(
+        session_factory: async_sessionmaker[AsyncSession], post_id: uuid.UUID
+) -> tuple[int, datetime] | None:
+    async with session_factory() as db_session:
+        return await PostRepo(db_session).get_document_stamp(post_id)
+
+
+async def _get_related_posts(
+        repo: PostRepo, post_id: uuid.UUID) -> list[RelatedPostDTO]:
+    return [
+        RelatedPostDTO(id=related_id, score=score)
+        for related_id, score in await repo.get_related(post_id)
+    ]
+
+
+async def _get_posts(
+        repo: PostRepo, post_ids: list[uuid.UUID]) -> list[PostOutDTO | None]:
+    """Posts in the order of post_ids, None where a post was not found"""
+    documents = await repo.get_documents(post_ids)
+    return [
+        PostOutDTO.model_validate(documents[post_id]) if post_id in documents else None
+        for post_id in post_ids
+    ]
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+async def hash_upload(file: UploadFile) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    await file.seek(0)
+    return digest.hexdigest(), size
+
+
 async def s3_put_files(
         files: list[UploadFile],
         db_session: AsyncSession,
         post_id: uuid.UUID
 ):
+    repo = BlobRepo(db_session)
+    deletions = MediaDeletionRepo(db_session)
     tasks = []
     for file in files:
         ext = pathlib.Path(file.filename).suffix
-        media = Media(id=uuid7(), media_type=ext, post_id=post_id)
+        blob_hash, size = await hash_upload(file)
+        media = Media(
+            id=uuid7(), media_type=ext, post_id=post_id, blob_hash=blob_hash
+        )
+        if await repo.acquire(blob_hash, size):
+            # waits for a sweeper holding this key, so it cannot delete the new upload
+            await deletions.discard([blob_hash])
+            tasks.append(s3_media_upload(file.file, blob_hash))
         db_session.add(media)
-        tasks.append(s3_media_upload(file.file, media.id, ext))
     await asyncio.gather(*tasks)
 
 
+async def _delete_posts(
+        repo: PostRepo, author_id: uuid.UUID, post_ids: list[uuid.UUID]) -> int:
+    deleted = await repo.delete_posts(
+        (Post.author_id == author_id) & Post.id.in_(post_ids)
+    )
+    await repo.session.commit()
+    author_summaries.invalidate(author_id)
+    return deleted
+
+
+async def sweep_media_deletions(db_session: AsyncSession) -> int:
+    """Delete one batch of queued S3 keys, returns how many were deleted"""
+    repo = MediaDeletionRepo(db_session)
+    keys = await repo.claim(DELETE_BATCH_SIZE)
+    if not keys:
+        return 0
+    failed = set(await s3_delete_objects(keys))
+    await repo.discard([key for key in keys if key not in failed])
+    await db_session.commit()
+    return len(keys) - len(failed)
+
+
+async def _get_dedup_stats(repo: MediaRepo) -> DedupStatsDTO:
+    return await repo.dedup_stats()
+
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+
+async def _request_fingerprint(
+        post: CreatePostDTO, tags: list[str] | None, media: list[UploadFile]) -> str:
+    request = [
+        post.model_dump(mode="json"),
+        tags or [],
+        [(file.filename, *await hash_upload(file)) for file in media],
+    ]
+    return hashlib.sha256(json.dumps(request).encode()).hexdigest()
+
+
+async def _replay(
+        repo: IdempotencyRepo, author_id: uuid.UUID, key: str, fingerprint: str
+) -> uuid.UUID:
+    post_id, stored_fingerprint = await repo.get(author_id, key) or (None, None)
+    # release the row lock taken by the failed claim
+    await repo.session.rollback()
+    if post_id is None:
+        raise HTTPException(
+            status_code=409, detail="request with this Idempotency-Key is in progress"
+        )
+    if stored_fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422, detail="Idempotency-Key was used for a different request"
+        )
+    return post_id
+
+
 async def create_post_fully(
         post: CreatePostDTO,
         author_id: uuid.UUID,
         db_session: AsyncSession,
         media: list[UploadFile],
-        tags: list[str]
+        tags: list[str],
+        idempotency_key: str | None = None
 ):
+    keys = IdempotencyRepo(db_session)
+    if idempotency_key is not None:
+        # first statement of the transaction: a duplicate in flight makes
+        # this wait for the original to commit or roll back
+        fingerprint = await _request_fingerprint(post, tags, media)
+        if not await keys.claim(
+                author_id, idempotency_key, fingerprint, IDEMPOTENCY_TTL):
+            return await _replay(keys, author_id, idempotency_key, fingerprint)
     post = await _create_post(PostRepo(db_session), post, author_id)
     await add_tags(post, TagRepo(db_session), tags)
     print(f'test 5{media}')
     if media:
         await s3_put_files(media, db_session, post.id)
+    await db_session.flush()
+    repo = PostRepo(db_session)
+    await repo.refresh_documents(Post.id == post.id)
+    await repo.refresh_related([post.id])
+    await AuthorStatsRepo(db_session).add_posts(Post.id == post.id)
+    await repo.bump_versions(Post.id == post.id)
+    await notify(db_session, POST_CREATED, [
+        _created_event(post.id, post.category_id, tags or [])
+    ])
+    if idempotency_key is not None:
+        await keys.complete(author_id, idempotency_key, post.id)
     await db_session.commit()
+    author_summaries.invalidate(author_id)
     return post.id
 
 
-async def _get_media(
-        media_id: uuid.UUID,
-        repo: MediaRepo,
-):
+async def purge_idempotency_keys(db_session: AsyncSession) -> int:
+    """Delete one batch of expired idempotency keys, returns how many"""
+    purged = await IdempotencyRepo(db_session).purge_expired()
+    await db_session.commit()
+    return purged
+
+
+def _created_event(
+        post_id: uuid.UUID, category_id: int, tags: list[str]) -> dict:
+    return {
+        "id": str(post_id),
+        "category_id": category_id,
+        "tags": list(dict.fromkeys(tags)),
+    }
+
+
+def publish_created(event: dict) -> None:
+    tag_index.add(event["tags"])
+    post_hub.publish(post_topics(event["category_id"], event["tags"]), event)
+
+
+MAX_BATCH_SIZE = 500
+
+
+async def create_posts_batch(
+        posts: list[BatchPostDTO],
+        author_id: uuid.UUID,
+        db_session: AsyncSession,
+) -> list[uuid.UUID]:
+    if len(posts) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=422, detail=f"at most {MAX_BATCH_SIZE} posts per batch"
+        )
+    category_repo = CategoryRepo(db_session)
+    errors = [
+        BatchItemErrorDTO(index=index, detail="specified category does not exist")
+        for index, post in enumerate(posts)
+        if not await category_registry.exists(category_repo, post.category_id)
+    ]
+    if errors:
+        raise HTTPException(
+            status_code=422, detail=[e.model_dump() for e in errors]
+        )
+
+    now = datetime.now()
+    rows = [
+        {
+            "id": uuid7(),
+            "text": post.text,
+            "category_id": post.category_id,
+            "author_id": author_id,
+            "date_created": now,
+        }
+        for post in posts
+    ]
+    tag_ids = await TagRepo(db_session).get_or_create_tags(
+        {tag for post in posts for tag in post.tags}
+    )
+    links = [
+        {"post_id": row["id"], "tag_id": tag_ids[tag]}
+        for row, post in zip(rows, posts)
+        for tag in set(post.tags)
+    ]
+    repo = PostRepo(db_session)
     try:
-        media = await repo.get_media(media_id)
-    except NoResultFound:
-        raise HTTPException(status_code=404, detail="no such media")
-    return await s3_get_media(media_id, media.media_type)
+        await repo.create_posts(rows, links)
+    except IntegrityError:
+        await db_session.rollback()
+        raise HTTPException(status_code=422, detail="specified category does not exist")
+    ids = [row["id"] for row in rows]
+    await repo.refresh_documents(Post.id.in_(ids))
+    await repo.refresh_related(ids)
+    await AuthorStatsRepo(db_session).add_posts(Post.id.in_(ids))
+    await repo.bump_versions(Post.id.in_(ids))
+    await notify(db_session, POST_CREATED, [
+        _created_event(row["id"], row["category_id"], post.tags)
+        for row, post in zip(rows, posts)
+    ])
+    await db_session.commit()
+    author_summaries.invalidate(author_id)
+    return ids
+
+
+async def _fetch_media(
+        session_factory: async_sessionmaker[AsyncSession], media_id: uuid.UUID
+) -> tuple[bytes, str]:
+    async with session_factory() as db_session:
+        try:
+            media = await MediaRepo(db_session).get_media(media_id)
+        except NoResultFound:
+            raise HTTPException(status_code=404, detail="no such media")
+    return await s3_get_object(media.storage_key), media.media_type
 
 
-async def _get_posts_by_tag(repo: PostRepo, tag: str) -> list[uuid.UUID]:
-    res = await repo.get_posts_by_tag(tag)
+async def _get_media(
+        session_factory: async_sessionmaker[AsyncSession], media_id: uuid.UUID):
+    content, ext = await media_reads.do(
+        media_id, partial(_fetch_media, session_factory, media_id)
+    )
+    return media_response(content, ext)
+
+
+async def _get_posts_by_tag(
+        repo: PostRepo, tag: str, since: datetime | None = None
+) -> list[uuid.UUID]:
+    res = await repo.get_posts_by_tag(tag, since)
     return [obj[0] for obj in res]
+
+
+async def _stream_posts_by_category(
+        session_factory: async_sessionmaker[AsyncSession],
+        category_id: int,
+        since: datetime | None = None
+) -> AsyncIterator[list[uuid.UUID]]:
+    # own session: the request's one is closed before the body is sent. It
+    # holds a connection until the last batch is sent, the "stream" limiter
+    # class caps how many do at once
+    async with session_factory() as db_session:
+        async for batch in PostRepo(db_session).stream_posts_by_category(
+                category_id, since):
+            yield batch
+
+
+async def _stream_posts_by_tag(
+        session_factory: async_sessionmaker[AsyncSession],
+        tag: str,
+        since: datetime | None = None
+) -> AsyncIterator[list[uuid.UUID]]:
+    async with session_factory() as db_session:
+        async for batch in PostRepo(db_session).stream_posts_by_tag(tag, since):
+            yield batch
+
+
+async def _get_posts_by_tags(
+        post_repo: PostRepo,
+        tag_repo: TagRepo,
+        tags: list[str],
+        match_all: bool,
+        exclude: list[str],
+        after: uuid.UUID | None,
+        limit: int,
+) -> PostPageDTO:
+    tag_ids = await tag_repo.get_tag_ids(tags + exclude)
+    wanted = [tag_ids[tag] for tag in tags if tag in tag_ids]
+    if not wanted or (match_all and len(wanted) < len(set(tags))):
+        return PostPageDTO(items=[])
+    items = await post_repo.get_posts_by_tags(
+        wanted,
+        match_all,
+        [tag_ids[tag] for tag in exclude if tag in tag_ids],
+        after,
+        limit,
+    )
+    return PostPageDTO(
+        items=items, next=items[-1] if len(items) == limit else None
+    )
+
+
+async def stream_posts(
+        topics: set[str], heartbeat: float
+) -> AsyncIterator[str]:
+    subscription = post_hub.subscribe(topics)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=heartbeat
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if subscription.dropped:
+                yield f"event: lagged\ndata: {subscription.dropped}\n\n"
+                subscription.dropped = 0
+            yield f"event: post\ndata: {json.dumps(event)}\n\n"
+    finally:
+        post_hub.unsubscribe(subscription)
@@ -0,0 +1,58 @@
+import asyncio
+from collections import defaultdict
+from typing import Any
+
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, topics: set[str], maxsize: int) -> None:
+        self.topics = topics
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, message: Any) -> None:
+        """Enqueue without blocking, dropping the oldest message when full"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class Hub:
+    """In-process fan-out of messages to subscribers by topic"""
+
+    def __init__(self) -> None:
+        self._topics: dict[str, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: set[str], maxsize: int = QUEUE_SIZE) -> Subscription:
+        subscription = Subscription(topics, maxsize)
+        for topic in topics:
+            self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[topic]
+
+    def publish(self, topics: set[str], message: Any) -> None:
+        receivers = set()
+        for topic in topics:
+            receivers.update(self._topics.get(topic, ()))
+        for subscription in receivers:
+            subscription.push(message)
+
+
+def post_topics(category_id: int | None, tags: list[str]) -> set[str]:
+    topics = {f"tag:{tag}" for tag in tags}
+    if category_id is not None:
+        topics.add(f"category:{category_id}")
+    return topics
+
+
+post_hub = Hub()
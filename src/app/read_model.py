@@ -0,0 +1,45 @@
+"""Rebuild the post_document read model from the source tables.
+
+Usage: python -m src.app.read_model [--batch-size 5000]
+
+Walks post in primary key order and re-renders one batch per transaction,
+so it can run against a live database.
+"""
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+
+from src.infrastructure.database.factory import dispose_engine, get_sessionmaker
+from src.infrastructure.database.models import Post
+from src.infrastructure.database.repo import PostRepo
+
+
+async def rebuild(batch_size: int) -> int:
+    rebuilt = 0
+    after = None
+    while True:
+        async with get_sessionmaker()() as session:
+            repo = PostRepo(session)
+            ids = await repo.get_ids_after(after, batch_size)
+            if not ids:
+                break
+            await repo.refresh_documents(Post.id.between(ids[0], ids[-1]))
+            await session.commit()
+        rebuilt += len(ids)
+        after = ids[-1]
+        print(f"rebuilt {rebuilt} posts")
+    await dispose_engine()
+    return rebuilt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(rebuild(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Recompute related posts for every post.
+
+Usage: python -m src.app.related [--batch-size 500]
+
+Walks post in primary key order and recomputes one batch of neighbour
+lists per transaction. New posts are kept current on creation, a rebuild
+is only needed after backfilling or to let tag weights catch up.
+"""
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+
+from src.infrastructure.database.factory import dispose_engine, get_sessionmaker
+from src.infrastructure.database.repo import PostRepo
+
+
+async def rebuild(batch_size: int) -> int:
+    rebuilt = 0
+    after = None
+    while True:
+        async with get_sessionmaker()() as session:
+            repo = PostRepo(session)
+            ids = await repo.get_ids_after(after, batch_size)
+            if not ids:
+                break
+            await repo.refresh_related(ids, propagate=False)
+            await session.commit()
+        rebuilt += len(ids)
+        after = ids[-1]
+        print(f"related posts of {rebuilt} posts")
+    await dispose_engine()
+    return rebuilt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(rebuild(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import json
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Annotated, List
 
-from pydantic import BaseModel, Field, EmailStr, ConfigDict, model_validator
+from pydantic import (
+    BaseModel, Field, EmailStr, ConfigDict, computed_field, model_validator)
 
 UTC_6 = timezone(timedelta(hours=6))
 
@@ -18,6 +19,11 @@ class TagDTO(BaseModel):
     name: str
 
 
+class TagSuggestionDTO(BaseModel):
+    name: str
+    posts: int
+
+
 class CreatePostDTO(BaseModel):
     text: str
     category_id: int
@@ -30,6 +36,21 @@ class CreatePostDTO(BaseModel):
         return value
 
 
+# keeps the post_created notification, which lists the tags, far below
+# the 8000 bytes pg_notify accepts: 32 tags of 40 characters of up to 4 bytes
+MAX_POST_TAGS = 32
+TagName = Annotated[str, Field(max_length=40)]
+
+
+class BatchPostDTO(CreatePostDTO):
+    tags: list[TagName] = Field(default=[], max_length=MAX_POST_TAGS)
+
+
+class BatchItemErrorDTO(BaseModel):
+    index: int
+    detail: str
+
+
 class PostDTO(CreatePostDTO):
     id: uuid.UUID
     date_created: datetime
@@ -43,6 +64,30 @@ class PostOutDTO(PostDTO):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RelatedPostDTO(BaseModel):
+    id: uuid.UUID
+    score: float
+
+
+class DedupStatsDTO(BaseModel):
+    media_count: int
+    blob_count: int
+    stored_bytes: int
+    referenced_bytes: int
+
+    @computed_field
+    @property
+    def dedup_ratio(self) -> float:
+        if not self.stored_bytes:
+            return 1.0
+        return self.referenced_bytes / self.stored_bytes
+
+
+class PostPageDTO(BaseModel):
+    items: list[uuid.UUID]
+    next: uuid.UUID | None = None
+
+
 class PostAuthorDTO(BaseModel):
     author: "AuthorOutDTO"
 
@@ -69,10 +114,36 @@ class AuthorCreateDTO(AuthorBaseDTO):
     password: str = Field(max_length=30, min_length=8)
 
 
+class AvailabilityDTO(BaseModel):
+    username: bool | None = None
+    email: bool | None = None
+
+
 class AuthorOutDTO(AuthorBaseDTO):
     id: uuid.UUID
 
 
+class TagCountDTO(BaseModel):
+    name: str
+    posts: int
+
+
+class CategoryCountDTO(BaseModel):
+    id: int
+    name: str
+    posts: int
+
+
+class AuthorSummaryDTO(BaseModel):
+    id: uuid.UUID
+    username: str
+    name: str
+    posts: int
+    last_post_at: datetime | None = None
+    top_tags: list[TagCountDTO] = []
+    top_categories: list[CategoryCountDTO] = []
+
+
 class AuthorDTO(AuthorOutDTO):
     hashed_password: str
 
@@ -0,0 +1,63 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+MAX_WAITERS = 1000
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The call runs as its own task, so a caller that is cancelled (a client
+    disconnecting) neither cancels it for the others nor receives a half
+    finished result; the task is cancelled only once nobody waits for it.
+    A flight takes at most ``max_waiters`` callers, the next caller starts a
+    fresh flight that later callers join.
+    """
+
+    def __init__(self, max_waiters: int = MAX_WAITERS) -> None:
+        self.max_waiters = max_waiters
+        self._flights: dict[Hashable, _Flight] = {}
+        self.calls = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None or flight.waiters >= self.max_waiters:
+            flight = self._start(key, fn)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> _Flight:
+        self.calls += 1
+        flight = _Flight(asyncio.ensure_future(fn()))
+        self._flights[key] = flight
+
+        def forget(task: asyncio.Task) -> None:
+            self._forget(key, flight)
+            if not task.cancelled():
+                # retrieved here so an exception nobody awaited is not logged
+                task.exception()
+
+        flight.task.add_done_callback(forget)
+        return flight
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
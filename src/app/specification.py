@@ -1,40 +1,174 @@
-from abc import ABCMeta
+from abc import ABCMeta, abstractmethod
+from collections.abc import Hashable, Iterable, Iterator
+from datetime import datetime
 from typing import Any
 from uuid import UUID
 
+from sqlalchemy import ColumnElement, and_, bindparam, not_, or_
+
+from src.app.uuid7 import uuid7_lower_bound
+
 
 class Specification(metaclass=ABCMeta):
-    def is_specified(self) -> dict[Any, Any]:
-        raise NotImplementedError
+    """Query condition that compiles to a SQLAlchemy expression.
+
+    ``shape()`` identifies the statement structure, ``params()`` holds the
+    values bound to it, so statements can be cached per shape.
+    """
+
+    @abstractmethod
+    def shape(self) -> Hashable:
+        ...
+
+    @abstractmethod
+    def params(self) -> list[Any]:
+        ...
+
+    @abstractmethod
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        ...
+
+    def __and__(self, other: "Specification") -> "Specification":
+        return AndSpecification(self, other)
+
+    def __or__(self, other: "Specification") -> "Specification":
+        return OrSpecification(self, other)
+
+    def __invert__(self) -> "Specification":
+        return NotSpecification(self)
+
+
+class FieldSpecification(Specification):
+    def __init__(self, field: str, value: Any):
+        self.field = field
+        self.value = value
 
+    def is_specified(self) -> dict[str, Any]:
+        """Keyword arguments for filter_by, only equality has them"""
+        return {self.field: self.value}
 
-class NameSpecification(Specification):
+    def shape(self) -> Hashable:
+        return "eq", self.field
+
+    def params(self) -> list[Any]:
+        return [self.value]
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        return getattr(model, self.field) == bindparam(next(names))
+
+
+class NameSpecification(FieldSpecification):
     def __init__(self, name: str):
+        super().__init__('name', name)
         self.name = name
 
-    def is_specified(self) -> dict[str, str]:
-        return {'name': self.name}
-
 
-class IDSpecification(Specification):
+class IDSpecification(FieldSpecification):
     def __init__(self, id: UUID):
+        super().__init__('id', id)
         self.id = id
 
-    def is_specified(self) -> dict[str, UUID]:
-        return {'id': self.id}
-
 
-class EmailSpecification(Specification):
+class EmailSpecification(FieldSpecification):
     def __init__(self, email: str):
+        super().__init__('email', email)
         self.email = email
 
-    def is_specified(self) -> dict[str, str]:
-        return {'email': self.email}
 
-
-class UsernameSpecification(Specification):
+class UsernameSpecification(FieldSpecification):
     def __init__(self, username: str):
+        super().__init__('username', username)
         self.username = username
 
-    def is_specified(self) -> dict[str, str]:
-        return {'username': self.username}
+
+class InSpecification(Specification):
+    def __init__(self, field: str, values: Iterable[Any]):
+        self.field = field
+        self.values = list(values)
+
+    def shape(self) -> Hashable:
+        return "in", self.field
+
+    def params(self) -> list[Any]:
+        return [self.values]
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        return getattr(model, self.field).in_(
+            bindparam(next(names), expanding=True)
+        )
+
+
+class RangeSpecification(Specification):
+    """lower <= field < upper, either bound may be omitted"""
+
+    def __init__(self, field: str, lower: Any = None, upper: Any = None):
+        if lower is None and upper is None:
+            raise ValueError(f"range on {field} needs a lower or an upper bound")
+        self.field = field
+        self.lower = lower
+        self.upper = upper
+
+    def shape(self) -> Hashable:
+        return "range", self.field, self.lower is None, self.upper is None
+
+    def params(self) -> list[Any]:
+        return [v for v in (self.lower, self.upper) if v is not None]
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        column = getattr(model, self.field)
+        clauses = []
+        if self.lower is not None:
+            clauses.append(column >= bindparam(next(names)))
+        if self.upper is not None:
+            clauses.append(column < bindparam(next(names)))
+        return and_(*clauses)
+
+
+class CreatedBetweenSpecification(RangeSpecification):
+    """Range over the creation time stored in a uuid7 primary key"""
+
+    def __init__(self, start: datetime | None = None, end: datetime | None = None):
+        super().__init__(
+            'id',
+            None if start is None else uuid7_lower_bound(start),
+            None if end is None else uuid7_lower_bound(end),
+        )
+
+
+class AndSpecification(Specification):
+    def __init__(self, left: Specification, right: Specification):
+        self.left = left
+        self.right = right
+
+    def shape(self) -> Hashable:
+        return "and", self.left.shape(), self.right.shape()
+
+    def params(self) -> list[Any]:
+        return self.left.params() + self.right.params()
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        left = self.left.to_expression(model, names)
+        return and_(left, self.right.to_expression(model, names))
+
+
+class OrSpecification(AndSpecification):
+    def shape(self) -> Hashable:
+        return "or", self.left.shape(), self.right.shape()
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        left = self.left.to_expression(model, names)
+        return or_(left, self.right.to_expression(model, names))
+
+
+class NotSpecification(Specification):
+    def __init__(self, specification: Specification):
+        self.specification = specification
+
+    def shape(self) -> Hashable:
+        return "not", self.specification.shape()
+
+    def params(self) -> list[Any]:
+        return self.specification.params()
+
+    def to_expression(self, model: Any, names: Iterator[str]) -> ColumnElement:
+        return not_(self.specification.to_expression(model, names))
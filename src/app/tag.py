@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+from src.app.schemas import TagSuggestionDTO
+from src.infrastructure.database.repo import TagRepo
+
+TOP_K = 20
+SCAN_LIMIT = 2000
+# sorts after any character a tag name can contain
+PREFIX_END = "\U0010ffff"
+
+
+class TagIndex:
+    """Popularity-weighted prefix index over tag names.
+
+    Names are kept in a sorted list, so the tags starting with a prefix are
+    one contiguous slice found by bisection. Prefixes matching more than
+    SCAN_LIMIT names keep a precomputed top-K by post count, every other
+    prefix is answered by picking the top of a slice of at most SCAN_LIMIT
+    names. Counts follow new posts through ``add`` and are rebuilt from the
+    database by ``load``. Names first seen through ``add`` go to a small
+    sorted list of their own and join the main one on the next load.
+    """
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.recent: list[str] = []
+        self.counts: dict[str, int] = {}
+        self.top: dict[str, list[str]] = {}
+        self.ready = False
+        # tags added while a load reads the database, None outside a load
+        self.pending: list[list[str]] | None = None
+
+    async def load(self, repo: TagRepo) -> None:
+        self.pending = []
+        try:
+            counts = {name: count async for name, count in repo.stream_tag_counts()}
+            names, top = await asyncio.to_thread(_build, counts)
+            # the counts are a snapshot taken when the query started, posts
+            # announced since then are counted again before the swap
+            fresh = TagIndex()
+            fresh.names, fresh.counts, fresh.top = names, counts, top
+            for tags in self.pending:
+                fresh._count(tags)
+        finally:
+            self.pending = None
+        self.names, self.recent = fresh.names, fresh.recent
+        self.counts, self.top = fresh.counts, fresh.top
+        self.ready = True
+
+    def add(self, tags: list[str]) -> None:
+        """Count one more post for each tag, adding tags not seen yet"""
+        if self.pending is not None:
+            self.pending.append(tags)
+        if self.ready:
+            self._count(tags)
+
+    def _count(self, tags: list[str]) -> None:
+        for name in tags:
+            if name in self.counts:
+                self.counts[name] += 1
+            else:
+                self.counts[name] = 1
+                insort(self.recent, name)
+            self._promote(name)
+
+    def _promote(self, name: str) -> None:
+        count = self.counts[name]
+        # tops are ordered by descending count, ties keep their order
+        key = self._descending
+        for end in range(len(name) + 1):
+            top = self.top.get(name[:end])
+            if top is None:
+                continue
+            try:
+                index = top.index(name)
+            except ValueError:
+                if len(top) == TOP_K and self.counts[top[-1]] >= count:
+                    continue
+                top.insert(bisect_right(top, -count, key=key), name)
+                del top[TOP_K:]
+                continue
+            # only this entry grew, it moves up past the smaller counts
+            position = bisect_right(top, -count, hi=index, key=key)
+            if position < index:
+                top.insert(position, top.pop(index))
+
+    def _descending(self, name: str) -> int:
+        return -self.counts[name]
+
+    def suggest(self, prefix: str, limit: int) -> list[TagSuggestionDTO]:
+        top = self.top.get(prefix)
+        if top is None:
+            lo, hi = _bounds(self.names, prefix)
+            recent_lo, recent_hi = _bounds(self.recent, prefix)
+            top = heapq.nlargest(
+                limit,
+                chain(self.names[lo:hi], self.recent[recent_lo:recent_hi]),
+                key=self.counts.__getitem__
+            )
+        return [
+            TagSuggestionDTO(name=name, posts=self.counts[name])
+            for name in top[:limit]
+        ]
+
+
+def _bounds(names: list[str], prefix: str, lo: int = 0, hi: int | None = None):
+    hi = len(names) if hi is None else hi
+    return (bisect_left(names, prefix, lo, hi),
+            bisect_left(names, prefix + PREFIX_END, lo, hi))
+
+
+def _build(counts: dict[str, int]) -> tuple[list[str], dict[str, list[str]]]:
+    names = sorted(counts)
+    top = {}
+    pending = [("", 0, len(names))]
+    while pending:
+        prefix, lo, hi = pending.pop()
+        if hi - lo <= SCAN_LIMIT:
+            continue
+        top[prefix] = heapq.nlargest(TOP_K, names[lo:hi], key=counts.__getitem__)
+        # walk the children of the prefix, one bisection per distinct next character
+        depth = len(prefix)
+        while lo < hi:
+            if len(names[lo]) == depth:
+                lo += 1
+                continue
+            child = names[lo][:depth + 1]
+            end = _bounds(names, child, lo, hi)[1]
+            pending.append((child, lo, end))
+            lo = end
+    return names, top
+
+
+async def _suggest_from_database(
+        repo: TagRepo, prefix: str, limit: int) -> list[TagSuggestionDTO]:
+    rows = await repo.suggest(prefix, limit)
+    return [TagSuggestionDTO(name=name, posts=count) for name, count in rows]
+
+
+async def _suggest_tags(
+        repo: TagRepo, prefix: str, limit: int) -> list[TagSuggestionDTO]:
+    if tag_index.ready:
+        return tag_index.suggest(prefix, limit)
+    return await _suggest_from_database(repo, prefix, limit)
+
+
+tag_index = TagIndex()
@@ -1,6 +1,7 @@
 import time
 import random
 import uuid
+from datetime import datetime, timezone
 from uuid import UUID
 
 sequenceCounter = 0
@@ -113,3 +114,19 @@ def uuid7(devDebugs: bool = False, returnType: str = 'hex') -> UUID:
         return uuid.UUID(UUIDv7_formatted)
 
     raise ValueError('return type was not specified')
+
+
+def uuid7_lower_bound(moment: datetime) -> UUID:
+    """Smallest uuid7 generated at or after the start of the given second"""
+    return uuid.UUID(int=int(moment.timestamp()) << 92)
+
+
+def uuid7_datetime(value: UUID) -> datetime:
+    """Creation time encoded in a uuid7 produced by uuid7()"""
+    sec = value.int >> 92
+    subsec = (
+        ((value.int >> 80) & 0xFFF) << 18
+        | ((value.int >> 64) & 0xFFF) << 6
+        | (value.int >> 56) & 0x3F
+    )
+    return datetime.fromtimestamp(sec + subsec / 2 ** 30, tz=timezone.utc)
@@ -1,4 +1,5 @@
-from dotenv import load_dotenv
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +11,9 @@ class DBConfig(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DB_NAME: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_ECHO: bool = True
 
     @property
     def uri(self) -> str:
@@ -24,6 +28,6 @@ class DBConfig(BaseSettings):
     )
 
 
-load_dotenv()
-
-db_config = DBConfig()
+@lru_cache
+def get_db_config() -> DBConfig:
+    return DBConfig()
@@ -1,26 +1,54 @@
+import asyncio
+from functools import lru_cache
 from typing import AsyncGenerator
 
-from src.infrastructure.database.config import db_config
+from src.infrastructure.database.config import get_db_config
 
-from sqlalchemy.ext.asyncio.engine import create_async_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio.engine import AsyncEngine, create_async_engine
 from sqlalchemy.ext.asyncio import (
     async_sessionmaker, AsyncSession)
 
 
-engine = create_async_engine(
-    url=db_config.uri,
-    echo=True,
-    pool_size=5,
-    max_overflow=10,
-)
+@lru_cache
+def get_engine() -> AsyncEngine:
+    db_config = get_db_config()
+    return create_async_engine(
+        url=db_config.uri,
+        echo=db_config.DB_ECHO,
+        pool_size=db_config.DB_POOL_SIZE,
+        max_overflow=db_config.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
 
-SessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False)
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=get_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+async def warm_db_pool() -> None:
+    """Open pool_size connections at once so first requests skip the handshake"""
+    engine = get_engine()
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(
+        *(ping() for _ in range(get_db_config().DB_POOL_SIZE))
+    )
+
+
+async def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
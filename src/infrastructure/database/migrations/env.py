@@ -3,11 +3,15 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
+from dotenv import load_dotenv
 
-from src.infrastructure.database.config import db_config
+from src.infrastructure.database.config import get_db_config
 from src.infrastructure.database.models import Base
 config = context.config
 
+load_dotenv()
+db_config = get_db_config()
+
 section = config.config_ini_section
 
 config.set_section_option(section, 'DB_HOST', db_config.DB_HOST)
@@ -0,0 +1,32 @@
+"""media deletion queue
+
+Revision ID: 27946cbee3bc
+Revises: 570534776871
+Create Date: 2026-10-19 14:48:09.117352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '27946cbee3bc'
+down_revision: Union[str, None] = '570534776871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_deletion',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('queued_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_media_deletion_queued_at'), 'media_deletion', ['queued_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_media_deletion_queued_at'), table_name='media_deletion')
+    op.drop_table('media_deletion')
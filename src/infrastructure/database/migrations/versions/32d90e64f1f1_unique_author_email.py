@@ -0,0 +1,34 @@
+"""unique author email
+
+Revision ID: 32d90e64f1f1
+Revises: 8f566118364b
+Create Date: 2026-10-19 11:02:37.915804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '32d90e64f1f1'
+down_revision: Union[str, None] = '8f566118364b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_author_email'), 'author', ['email'],
+            unique=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_author_email'), table_name='author',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,35 @@
+"""tag name prefix index
+
+Revision ID: 4c1e9a7d2b58
+Revises: 87e6e8f0a268
+Create Date: 2026-10-19 16:48:11.205377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e9a7d2b58'
+down_revision: Union[str, None] = '87e6e8f0a268'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tag_name_pattern', 'tag', ['name'],
+            postgresql_ops={'name': 'text_pattern_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tag_name_pattern', table_name='tag',
+            postgresql_concurrently=True
+        )
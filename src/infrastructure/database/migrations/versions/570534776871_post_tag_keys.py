@@ -0,0 +1,39 @@
+"""post_tag primary key and reverse index
+
+Revision ID: 570534776871
+Revises: 638d12cd8d5b
+Create Date: 2026-10-19 13:05:18.642990
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '570534776871'
+down_revision: Union[str, None] = '638d12cd8d5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('DELETE FROM post_tag WHERE post_id IS NULL OR tag_id IS NULL')
+    op.execute("""
+        DELETE FROM post_tag a USING post_tag b
+        WHERE a.ctid < b.ctid
+          AND a.post_id = b.post_id
+          AND a.tag_id = b.tag_id
+    """)
+    op.alter_column('post_tag', 'post_id', existing_type=sa.Uuid(), nullable=False)
+    op.alter_column('post_tag', 'tag_id', existing_type=sa.Uuid(), nullable=False)
+    op.create_primary_key('post_tag_pkey', 'post_tag', ['post_id', 'tag_id'])
+    op.create_index('ix_post_tag_tag_id_post_id', 'post_tag', ['tag_id', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_tag_tag_id_post_id', table_name='post_tag')
+    op.drop_constraint('post_tag_pkey', 'post_tag', type_='primary')
+    op.alter_column('post_tag', 'tag_id', existing_type=sa.Uuid(), nullable=True)
+    op.alter_column('post_tag', 'post_id', existing_type=sa.Uuid(), nullable=True)
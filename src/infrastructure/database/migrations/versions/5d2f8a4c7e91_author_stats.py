@@ -0,0 +1,72 @@
+"""author stats
+
+Revision ID: 5d2f8a4c7e91
+Revises: e61a4c9b07d3
+Create Date: 2026-10-19 19:04:52.318477
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a4c7e91'
+down_revision: Union[str, None] = 'e61a4c9b07d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('author_stats',
+    sa.Column('author_id', sa.Uuid(), nullable=False),
+    sa.Column('posts', sa.Integer(), nullable=False),
+    sa.Column('last_post_id', sa.Uuid(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['author.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('author_id')
+    )
+    op.create_table('author_tag',
+    sa.Column('author_id', sa.Uuid(), nullable=False),
+    sa.Column('tag_id', sa.Uuid(), nullable=False),
+    sa.Column('posts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['author.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('author_id', 'tag_id')
+    )
+    op.create_index('ix_author_tag_author_id_posts', 'author_tag', ['author_id', 'posts'], unique=False)
+    op.create_table('author_category',
+    sa.Column('author_id', sa.Uuid(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('posts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['author.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('author_id', 'category_id')
+    )
+    op.create_index('ix_author_category_author_id_posts', 'author_category', ['author_id', 'posts'], unique=False)
+
+    # counters of the posts written so far, later writes keep them current
+    op.execute("""
+        INSERT INTO author_stats (author_id, posts, last_post_id)
+        SELECT author_id, count(*), max(id::text)::uuid
+        FROM post GROUP BY author_id
+    """)
+    op.execute("""
+        INSERT INTO author_tag (author_id, tag_id, posts)
+        SELECT p.author_id, pt.tag_id, count(*)
+        FROM post p JOIN post_tag pt ON pt.post_id = p.id
+        GROUP BY p.author_id, pt.tag_id
+    """)
+    op.execute("""
+        INSERT INTO author_category (author_id, category_id, posts)
+        SELECT author_id, category_id, count(*)
+        FROM post GROUP BY author_id, category_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_author_category_author_id_posts', table_name='author_category')
+    op.drop_table('author_category')
+    op.drop_index('ix_author_tag_author_id_posts', table_name='author_tag')
+    op.drop_table('author_tag')
+    op.drop_table('author_stats')
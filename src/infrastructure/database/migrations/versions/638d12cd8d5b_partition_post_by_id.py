@@ -0,0 +1,93 @@
+"""partition post by uuid7 id
+
+Revision ID: 638d12cd8d5b
+Revises: 32d90e64f1f1
+Create Date: 2026-10-19 12:21:45.307112
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.app.uuid7 import uuid7_datetime
+from src.infrastructure.database.partitions import (
+    MONTHS_AHEAD, add_months, months_between, partition_ddl)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '638d12cd8d5b'
+down_revision: Union[str, None] = '32d90e64f1f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_post_foreign_keys() -> None:
+    op.drop_constraint('media_post_id_fkey', 'media', type_='foreignkey')
+    op.drop_constraint('post_tag_post_id_fkey', 'post_tag', type_='foreignkey')
+
+
+def _create_post_foreign_keys() -> None:
+    op.create_foreign_key('media_post_id_fkey', 'media', 'post', ['post_id'], ['id'])
+    op.create_foreign_key('post_tag_post_id_fkey', 'post_tag', 'post', ['post_id'], ['id'])
+
+
+def _rename_post_table(new_name: str) -> None:
+    op.rename_table('post', new_name)
+    op.execute(f'ALTER TABLE {new_name} RENAME CONSTRAINT post_pkey TO {new_name}_pkey')
+    op.execute(f'ALTER INDEX ix_post_author_id RENAME TO ix_{new_name}_author_id')
+    op.execute(f'ALTER INDEX ix_post_category_id RENAME TO ix_{new_name}_category_id')
+
+
+def upgrade() -> None:
+    _drop_post_foreign_keys()
+    _rename_post_table('post_unpartitioned')
+    op.execute("""
+        CREATE TABLE post (
+            id UUID NOT NULL,
+            text VARCHAR NOT NULL,
+            date_created TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            author_id UUID NOT NULL REFERENCES author (id),
+            category_id INTEGER NOT NULL REFERENCES category (id),
+            CONSTRAINT post_pkey PRIMARY KEY (id)
+        ) PARTITION BY RANGE (id)
+    """)
+    op.create_index(op.f('ix_post_author_id'), 'post', ['author_id'], unique=False)
+    op.create_index(op.f('ix_post_category_id'), 'post', ['category_id'], unique=False)
+
+    oldest = op.get_bind().execute(
+        # uuid has no min() aggregate, the primary key index orders it
+        sa.text('SELECT id FROM post_unpartitioned ORDER BY id LIMIT 1')
+    ).scalar()
+    today = datetime.now(tz=timezone.utc).date()
+    first = today if oldest is None else uuid7_datetime(oldest).date()
+    for month in months_between(first, add_months(today, MONTHS_AHEAD)):
+        op.execute(partition_ddl('post', month))
+    op.execute('CREATE TABLE post_default PARTITION OF post DEFAULT')
+
+    op.execute('INSERT INTO post SELECT id, text, date_created, author_id, '
+               'category_id FROM post_unpartitioned')
+    op.drop_table('post_unpartitioned')
+    _create_post_foreign_keys()
+
+
+def downgrade() -> None:
+    _drop_post_foreign_keys()
+    _rename_post_table('post_partitioned')
+    op.create_table('post',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('text', sa.String(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=False),
+    sa.Column('author_id', sa.Uuid(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['author.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_post_author_id'), 'post', ['author_id'], unique=False)
+    op.create_index(op.f('ix_post_category_id'), 'post', ['category_id'], unique=False)
+    op.execute('INSERT INTO post SELECT id, text, date_created, author_id, '
+               'category_id FROM post_partitioned')
+    op.drop_table('post_partitioned')
+    _create_post_foreign_keys()
@@ -0,0 +1,33 @@
+"""post document read model
+
+Revision ID: 87e6e8f0a268
+Revises: 27946cbee3bc
+Create Date: 2026-10-19 15:37:52.803164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '87e6e8f0a268'
+down_revision: Union[str, None] = '27946cbee3bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('post_document',
+    sa.Column('post_id', sa.Uuid(), nullable=False),
+    sa.Column('document', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('post_document')
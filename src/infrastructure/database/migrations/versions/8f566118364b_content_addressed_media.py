@@ -0,0 +1,39 @@
+"""content addressed media
+
+Revision ID: 8f566118364b
+Revises: edf5e7f5c69b
+Create Date: 2026-10-19 10:12:04.481230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f566118364b'
+down_revision: Union[str, None] = 'edf5e7f5c69b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blob',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('media', sa.Column('blob_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        op.f('fk_media_blob_hash_blob'), 'media', 'blob', ['blob_hash'], ['hash']
+    )
+    op.create_index(op.f('ix_media_blob_hash'), 'media', ['blob_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_media_blob_hash'), table_name='media')
+    op.drop_constraint(op.f('fk_media_blob_hash_blob'), 'media', type_='foreignkey')
+    op.drop_column('media', 'blob_hash')
+    op.drop_table('blob')
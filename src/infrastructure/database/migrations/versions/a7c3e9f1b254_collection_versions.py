@@ -0,0 +1,28 @@
+"""collection versions
+
+Revision ID: a7c3e9f1b254
+Revises: 5d2f8a4c7e91
+Create Date: 2026-10-19 21:12:08.524361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e9f1b254'
+down_revision: Union[str, None] = '5d2f8a4c7e91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('category', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('tag', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('tag', 'version')
+    op.drop_column('category', 'version')
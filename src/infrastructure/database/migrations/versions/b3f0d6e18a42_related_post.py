@@ -0,0 +1,35 @@
+"""related posts
+
+Revision ID: b3f0d6e18a42
+Revises: 4c1e9a7d2b58
+Create Date: 2026-10-19 17:32:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f0d6e18a42'
+down_revision: Union[str, None] = '4c1e9a7d2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('related_post',
+    sa.Column('post_id', sa.Uuid(), nullable=False),
+    sa.Column('related_id', sa.Uuid(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['related_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'related_id')
+    )
+    op.create_index(op.f('ix_related_post_related_id'), 'related_post', ['related_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_related_post_related_id'), table_name='related_post')
+    op.drop_table('related_post')
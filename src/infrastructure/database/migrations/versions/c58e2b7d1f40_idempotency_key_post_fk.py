@@ -0,0 +1,32 @@
+"""idempotency key post foreign key
+
+Revision ID: c58e2b7d1f40
+Revises: a7c3e9f1b254
+Create Date: 2026-10-19 22:41:37.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c58e2b7d1f40'
+down_revision: Union[str, None] = 'a7c3e9f1b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keys of posts deleted so far, the constraint keeps later ones in step
+    op.execute("""
+        UPDATE idempotency_key k SET post_id = NULL
+        WHERE post_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM post p WHERE p.id = k.post_id)
+    """)
+    op.create_foreign_key('idempotency_key_post_id_fkey', 'idempotency_key', 'post', ['post_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    op.drop_constraint('idempotency_key_post_id_fkey', 'idempotency_key', type_='foreignkey')
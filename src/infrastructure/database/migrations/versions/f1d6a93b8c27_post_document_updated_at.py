@@ -0,0 +1,28 @@
+"""post document updated at
+
+Revision ID: f1d6a93b8c27
+Revises: c58e2b7d1f40
+Create Date: 2026-10-19 23:18:04.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d6a93b8c27'
+down_revision: Union[str, None] = 'c58e2b7d1f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # documents rendered so far count as rendered now, no client holds a
+    # Last-Modified for them yet
+    op.add_column('post_document', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('post_document', 'updated_at')
@@ -3,8 +3,9 @@ import uuid
 from typing import List
 from datetime import datetime
 
-from sqlalchemy import String, Column, ForeignKey, Table
+from sqlalchemy import BigInteger, DateTime, Float, String, Column, ForeignKey, Index, Table, func
 from src.app.uuid7 import uuid7
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -15,8 +16,9 @@ class Base(DeclarativeBase):
 post_tag = Table(
     "post_tag",
     Base.metadata,
-    Column("post_id", ForeignKey("post.id")),
-    Column("tag_id", ForeignKey("tag.id")),
+    Column("post_id", ForeignKey("post.id"), primary_key=True),
+    Column("tag_id", ForeignKey("tag.id"), primary_key=True),
+    Index("ix_post_tag_tag_id_post_id", "tag_id", "post_id"),
 )
 
 
@@ -25,6 +27,10 @@ class Category(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(50), unique=True)
+    # moved in the transactions that add or delete posts of the category
+    version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
     posts: Mapped[List["Post"]] = relationship(
         back_populates="category",
         cascade="all, delete-orphan",
@@ -34,6 +40,10 @@ class Category(Base):
 
 class Tag(Base):
     __tablename__ = "tag"
+    __table_args__ = (
+        Index("ix_tag_name_pattern", "name",
+              postgresql_ops={"name": "text_pattern_ops"}),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     name: Mapped[str] = mapped_column(
@@ -42,6 +52,10 @@ class Tag(Base):
         unique=True,
         index=True
     )
+    # moved in the transactions that add or delete posts with the tag
+    version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
     posts: Mapped[List["Post"]] = relationship(
         secondary=post_tag,
         back_populates="tags",
@@ -54,6 +68,7 @@ class Tag(Base):
 
 class Post(Base):
     __tablename__ = "post"
+    __table_args__ = {"postgresql_partition_by": "RANGE (id)"}
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     text: Mapped[str] = mapped_column(nullable=False)
@@ -90,7 +105,7 @@ class Author(Base):
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     username: Mapped[str] = mapped_column(String(25), unique=True)
     name: Mapped[str] = mapped_column(String(25))
-    email: Mapped[str]
+    email: Mapped[str] = mapped_column(unique=True, index=True)
     hashed_password: Mapped[str]
 
     posts: Mapped[List['Post']] = relationship(
@@ -112,7 +127,143 @@ class Media(Base):
     post_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("post.id"), nullable=False, index=True
     )
+    blob_hash: Mapped[str | None] = mapped_column(
+        ForeignKey("blob.hash"), index=True
+    )
     post: Mapped["Post"] = relationship(back_populates='media')
 
+    @property
+    def storage_key(self) -> str:
+        if self.blob_hash is not None:
+            return self.blob_hash
+        return str(self.id) + self.media_type
+
     def __repr__(self) -> str:
         return f"<Media: {self.id}>"
+
+
+class Blob(Base):
+    __tablename__ = "blob"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ref_count: Mapped[int] = mapped_column(nullable=False, default=1)
+
+    def __repr__(self) -> str:
+        return f"<Blob: {self.hash}, refs:{self.ref_count}>"
+
+
+class MediaDeletion(Base):
+    __tablename__ = "media_deletion"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    queued_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<MediaDeletion: {self.key}>"
+
+
+class PostDocument(Base):
+    """PostOutDTO of a post, rendered when the post or its tags/media change"""
+    __tablename__ = "post_document"
+
+    post_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    version: Mapped[int] = mapped_column(nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<PostDocument: {self.post_id}, v{self.version}>"
+
+
+class RelatedPost(Base):
+    """Precomputed neighbour of a post by weighted tag overlap"""
+    __tablename__ = "related_post"
+
+    post_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    related_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<RelatedPost: {self.post_id} -> {self.related_id}, {self.score:.3f}>"
+
+
+class IdempotencyKey(Base):
+    """Idempotency-Key of a completed request and the post it created"""
+    __tablename__ = "idempotency_key"
+
+    author_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("author.id", ondelete="CASCADE"), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # null once the post is deleted, the key is then free to be used again
+    post_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("post.id", ondelete="SET NULL")
+    )
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey: {self.author_id}, {self.key}>"
+
+
+class AuthorStats(Base):
+    """Post count and newest post of an author, kept up to date on writes"""
+    __tablename__ = "author_stats"
+
+    author_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("author.id", ondelete="CASCADE"), primary_key=True
+    )
+    posts: Mapped[int] = mapped_column(nullable=False, default=0)
+    last_post_id: Mapped[uuid.UUID | None]
+
+    def __repr__(self) -> str:
+        return f"<AuthorStats: {self.author_id}, posts:{self.posts}>"
+
+
+class AuthorTag(Base):
+    """Number of posts of an author with a tag"""
+    __tablename__ = "author_tag"
+    __table_args__ = (
+        Index("ix_author_tag_author_id_posts", "author_id", "posts"),
+    )
+
+    author_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("author.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("tag.id", ondelete="CASCADE"), primary_key=True
+    )
+    posts: Mapped[int] = mapped_column(nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AuthorTag: {self.author_id}, {self.tag_id}, posts:{self.posts}>"
+
+
+class AuthorCategory(Base):
+    """Number of posts of an author in a category"""
+    __tablename__ = "author_category"
+    __table_args__ = (
+        Index("ix_author_category_author_id_posts", "author_id", "posts"),
+    )
+
+    author_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("author.id", ondelete="CASCADE"), primary_key=True
+    )
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("category.id", ondelete="CASCADE"), primary_key=True
+    )
+    posts: Mapped[int] = mapped_column(nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AuthorCategory: {self.author_id}, {self.category_id}, posts:{self.posts}>"
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable
+
+import asyncpg
+from sqlalchemy import Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.database.config import get_db_config
+
+logger = logging.getLogger(__name__)
+
+POST_CREATED = "post_created"
+AUTHOR_CREATED = "author_created"
+RECONNECT_DELAY = 1.0
+
+
+async def notify(session: AsyncSession, channel: str, payloads: list[Any]) -> None:
+    """Queue notifications, Postgres delivers them when the transaction commits"""
+    if not payloads:
+        return
+    messages = func.unnest(bindparam(
+        "payloads",
+        # raw UTF-8, escaped non-ASCII text would take up to 3 times the room
+        [json.dumps(p, default=str, ensure_ascii=False) for p in payloads],
+        type_=ARRAY(Text),
+    ))
+    await session.execute(
+        select(func.pg_notify(channel, messages.column_valued()))
+    )
+
+
+async def listen(callbacks: dict[str, Callable[[Any], None]]) -> None:
+    """Feed notifications on each channel to its callback over one connection,
+    reconnecting until cancelled"""
+    config = get_db_config()
+    while True:
+        try:
+            conn = await asyncpg.connect(
+                host=config.DB_HOST,
+                port=int(config.DB_PORT),
+                user=config.DB_USER,
+                password=config.DB_PASSWORD,
+                database=config.DB_NAME,
+            )
+        except (OSError, asyncpg.PostgresError):
+            logger.exception("cannot listen on %s, reconnecting", ", ".join(callbacks))
+            await asyncio.sleep(RECONNECT_DELAY)
+            continue
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        for channel, callback in callbacks.items():
+            await conn.add_listener(channel, _listener(callback))
+        try:
+            await lost.wait()
+            logger.warning("lost connection listening on %s", ", ".join(callbacks))
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+
+
+def _listener(callback: Callable[[Any], None]) -> Callable[..., None]:
+    return lambda _conn, _pid, _channel, payload: callback(json.loads(payload))
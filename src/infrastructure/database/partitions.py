@@ -0,0 +1,92 @@
+import logging
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.app.uuid7 import uuid7_lower_bound
+
+logger = logging.getLogger(__name__)
+
+POST_TABLE = "post"
+MONTHS_AHEAD = 3
+PARTITION_LOCK_ID = 5_032_001
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def partition_bounds(month: date) -> tuple[UUID, UUID]:
+    """Range of the uuid7 ids generated during the given month"""
+    lower = uuid7_lower_bound(month_start(month))
+    upper = uuid7_lower_bound(month_start(add_months(month, 1)))
+    return lower, upper
+
+
+def partition_ddl(table: str, month: date) -> str:
+    lower, upper = partition_bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def months_between(first: date, last: date) -> list[date]:
+    months = []
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+async def ensure_post_partitions(
+        engine: AsyncEngine, months_ahead: int = MONTHS_AHEAD) -> list[date]:
+    """Create the current and next months_ahead monthly partitions of post
+
+    Every month is created in its own transaction, so a month that cannot be
+    created does not hold back the others. A month whose ids already landed
+    in the default partition is skipped and reported: the rows cannot be
+    moved out while other tables reference them, so they have to be
+    dealt with by hand. Returns the skipped months.
+    """
+    today = datetime.now(tz=timezone.utc).date()
+    blocked = []
+    for month in months_between(today, add_months(today, months_ahead)):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:lock)"),
+                {"lock": PARTITION_LOCK_ID}
+            )
+            name = partition_name(POST_TABLE, month)
+            exists = await conn.scalar(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+            )
+            if exists:
+                continue
+            lower, upper = partition_bounds(month)
+            stray = await conn.scalar(
+                text(f"SELECT count(*) FROM {POST_TABLE}_default "
+                     "WHERE id >= :lower AND id < :upper"),
+                {"lower": lower, "upper": upper}
+            )
+            if stray:
+                logger.error(
+                    "partition %s not created: %d rows of its range are in "
+                    "%s_default", name, stray, POST_TABLE
+                )
+                blocked.append(month)
+                continue
+            await conn.execute(text(partition_ddl(POST_TABLE, month)))
+    return blocked
@@ -1,14 +1,123 @@
 import uuid
-from typing import Type, Any
+from collections.abc import Hashable
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Type, Any, AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    ColumnElement, Select, String, Uuid, any_, bindparam, cast, select, insert,
+    update, delete, exists, func, literal, or_, text, tuple_, union, union_all)
+from sqlalchemy.dialects.postgresql import (
+    ARRAY, aggregate_order_by, insert as pg_insert)
+from sqlalchemy.orm import noload, selectinload
 
-from src.app.specification import Specification
+from src.app.specification import IDSpecification, Specification
+from src.app.uuid7 import uuid7, uuid7_lower_bound
 from src.app.schemas import (
-    AuthorCreateDTO, AuthorDTO, CategoryDTO, CreatePostDTO)
-from src.infrastructure.database.models import Author, Category, Post, Tag, Media, post_tag
+    AuthorCreateDTO, AuthorDTO, CategoryDTO, CreatePostDTO, DedupStatsDTO)
+from src.infrastructure.database.models import (
+    Author, Category, Post, Tag, Media, Blob, MediaDeletion, PostDocument,
+    RelatedPost, IdempotencyKey, AuthorStats, AuthorTag, AuthorCategory, post_tag)
+
+STATEMENT_CACHE_SIZE = 512
+SUGGEST_CANDIDATES = 1000
+RELATED_POSTS = 10
+# tags on more posts than this say little about a post and only add pairs
+MAX_TAG_POSTS = 5000
+
+# Weighted Jaccard over tags, each tag weighted by ln(1 + posts / posts
+# with the tag): shared weight / (weight of a + weight of b - shared weight).
+# The post count comes from the planner estimate of the post partitions,
+# which is 0 before they are analyzed; the smoothing keeps weights positive
+# so that case degrades to plain Jaccard.
+_related_posts = text("""
+WITH src AS (
+    SELECT post_id, tag_id FROM post_tag WHERE post_id = ANY(:post_ids)
+), post_total AS (
+    SELECT greatest(sum(greatest(c.reltuples, 0)), 1)::float8 AS n
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'post'::regclass
+), src_df AS (
+    SELECT tag_id, count(*) AS n FROM post_tag
+    WHERE tag_id IN (SELECT tag_id FROM src) GROUP BY tag_id
+), pairs AS (
+    SELECT s.post_id, o.post_id AS related_id, s.tag_id
+    FROM src s
+    JOIN src_df d ON d.tag_id = s.tag_id AND d.n <= :max_tag_posts
+    JOIN post_tag o ON o.tag_id = s.tag_id AND o.post_id <> s.post_id
+), candidate_tags AS (
+    SELECT post_id, tag_id FROM post_tag
+    WHERE post_id IN (SELECT related_id FROM pairs)
+    UNION
+    SELECT post_id, tag_id FROM src
+), df AS (
+    SELECT tag_id, count(*)::float8 AS n FROM post_tag
+    WHERE tag_id IN (SELECT tag_id FROM candidate_tags) GROUP BY tag_id
+), weight AS (
+    SELECT df.tag_id, ln(1 + post_total.n / df.n) AS w
+    FROM df, post_total
+), post_weight AS (
+    SELECT c.post_id, sum(weight.w) AS total
+    FROM candidate_tags c JOIN weight USING (tag_id) GROUP BY c.post_id
+), shared AS (
+    SELECT p.post_id, p.related_id, sum(weight.w) AS shared
+    FROM pairs p JOIN weight USING (tag_id)
+    GROUP BY p.post_id, p.related_id HAVING sum(weight.w) > 0
+), scored AS (
+    SELECT s.post_id, s.related_id,
+           s.shared / (a.total + b.total - s.shared) AS score
+    FROM shared s
+    JOIN post_weight a ON a.post_id = s.post_id
+    JOIN post_weight b ON b.post_id = s.related_id
+), ranked AS (
+    SELECT *, row_number() OVER (
+        PARTITION BY post_id ORDER BY score DESC, related_id DESC) AS rank
+    FROM scored
+)
+INSERT INTO related_post (post_id, related_id, score)
+SELECT post_id, related_id, score FROM ranked WHERE rank <= :k
+""").bindparams(bindparam("post_ids", type_=ARRAY(Uuid)))
+
+# the score is symmetric, so new posts are offered to their neighbours' lists
+_propagate_related = text("""
+INSERT INTO related_post (post_id, related_id, score)
+SELECT related_id, post_id, score FROM related_post WHERE post_id = ANY(:post_ids)
+ON CONFLICT (post_id, related_id) DO UPDATE SET score = excluded.score
+""").bindparams(bindparam("post_ids", type_=ARRAY(Uuid)))
+
+_trim_related = text("""
+DELETE FROM related_post r USING (
+    SELECT post_id, related_id, row_number() OVER (
+        PARTITION BY post_id ORDER BY score DESC, related_id DESC) AS rank
+    FROM related_post
+    WHERE post_id IN (
+        SELECT related_id FROM related_post WHERE post_id = ANY(:post_ids))
+) t
+WHERE r.post_id = t.post_id AND r.related_id = t.related_id AND t.rank > :k
+""").bindparams(bindparam("post_ids", type_=ARRAY(Uuid)))
+
+_statement_cache: dict[Hashable, Select] = {}
+
+
+def select_by(
+        model: Any,
+        specification: Specification,
+        *columns: Any
+) -> tuple[Select, dict[str, Any]]:
+    """Statement for a specification, built once per specification shape"""
+    key = (model, columns, specification.shape())
+    query = _statement_cache.get(key)
+    if query is None:
+        names = (f"p{i}" for i in count())
+        query = select(*(columns or (model,))).where(
+            specification.to_expression(model, names)
+        )
+        if len(_statement_cache) >= STATEMENT_CACHE_SIZE:
+            _statement_cache.clear()
+        _statement_cache[key] = query
+    params = {f"p{i}": value for i, value in enumerate(specification.params())}
+    return query, params
 
 
 class TagRepo:
@@ -17,12 +126,63 @@ class TagRepo:
         self.model: Type[Tag] = Tag
 
     async def get_tag(self, specification: Specification):
-        query = select(self.model).filter_by(
-            **specification.is_specified()
-        )
-        res = await self.session.execute(query)
+        query, params = select_by(self.model, specification)
+        res = await self.session.execute(query, params)
         return res.scalar_one_or_none()
 
+    async def get_or_create_tags(self, names: set[str]) -> dict[str, uuid.UUID]:
+        if not names:
+            return {}
+        # sorted, so concurrent batches sharing new names insert them in the
+        # same order and wait on each other instead of deadlocking
+        stmt = pg_insert(self.model).values(
+            [{"id": uuid7(), "name": name} for name in sorted(names)]
+        ).on_conflict_do_nothing(index_elements=[self.model.name])
+        await self.session.execute(stmt)
+        query = (select(self.model.name, self.model.id).
+                 where(self.model.name.in_(names)))
+        res = await self.session.execute(query)
+        return dict(res.all())
+
+    async def get_tag_ids(self, names: list[str]) -> dict[str, uuid.UUID]:
+        query = (select(self.model.name, self.model.id).
+                 where(self.model.name.in_(names)))
+        res = await self.session.execute(query)
+        return dict(res.all())
+
+    async def get_tags(self, specification: Specification) -> list[Tag]:
+        query, params = select_by(self.model, specification)
+        res = await self.session.execute(query, params)
+        return list(res.scalars())
+
+    async def stream_tag_counts(
+            self, batch_size: int = 10_000) -> AsyncIterator[tuple[str, int]]:
+        query = (select(self.model.name, func.count(post_tag.c.post_id)).
+                 outerjoin(post_tag).
+                 group_by(self.model.id).
+                 execution_options(yield_per=batch_size))
+        res = await self.session.stream(query)
+        async for name, count in res:
+            yield name, count
+
+    async def suggest(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """Most used tags starting with prefix, among the first matches.
+
+        The prefix match is served by the text_pattern_ops index on name.
+        """
+        candidates = (select(self.model.id, self.model.name).
+                      where(self.model.name.startswith(prefix, autoescape=True)).
+                      limit(SUGGEST_CANDIDATES).
+                      subquery())
+        posts = func.count(post_tag.c.post_id)
+        query = (select(candidates.c.name, posts).
+                 outerjoin(post_tag, post_tag.c.tag_id == candidates.c.id).
+                 group_by(candidates.c.name).
+                 order_by(posts.desc(), candidates.c.name).
+                 limit(limit))
+        res = await self.session.execute(query)
+        return list(res.tuples())
+
 
 class PostRepo:
     def __init__(self, session: AsyncSession):
@@ -47,25 +207,323 @@ class PostRepo:
         res = await self.session.execute(stmt)
         return res.scalar_one()
 
+    async def refresh_documents(self, condition: ColumnElement) -> None:
+        """Re-render the post_document rows of matching posts from source tables"""
+        tags = (select(func.coalesce(func.jsonb_agg(Tag.name), text("'[]'"))).
+                join_from(self.association_table, Tag).
+                where(self.association_table.c.post_id == self.model.id).
+                scalar_subquery())
+        medias = (select(func.coalesce(
+                    func.jsonb_agg(aggregate_order_by(Media.id, Media.id)),
+                    text("'[]'"))).
+                  where(Media.post_id == self.model.id).
+                  scalar_subquery())
+        document = func.jsonb_build_object(
+            "id", self.model.id,
+            "text", self.model.text,
+            "date_created", self.model.date_created,
+            "author_id", self.model.author_id,
+            "category_id", self.model.category_id,
+            "tags", tags,
+            "medias", medias,
+        )
+        stmt = pg_insert(PostDocument).from_select(
+            ["post_id", "document", "version", "updated_at"],
+            select(self.model.id, document, literal(1), func.now()).where(condition),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PostDocument.post_id],
+            set_={
+                "document": stmt.excluded.document,
+                "version": PostDocument.version + 1,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def refresh_related(
+            self, post_ids: list[uuid.UUID], propagate: bool = True) -> None:
+        """Recompute the neighbours of a batch of posts with set-based statements.
+
+        With propagate the posts are also merged into the neighbour lists
+        of the posts they are related to, which is what a new post needs.
+        """
+        await self.session.execute(
+            delete(RelatedPost).
+            where(RelatedPost.post_id == any_(
+                bindparam("post_ids", type_=ARRAY(Uuid)))),
+            {"post_ids": post_ids}
+        )
+        params = {"post_ids": post_ids, "k": RELATED_POSTS}
+        await self.session.execute(
+            _related_posts, {**params, "max_tag_posts": MAX_TAG_POSTS}
+        )
+        if propagate:
+            await self.session.execute(_propagate_related, params)
+            await self.session.execute(_trim_related, params)
+
+    async def get_related(
+            self, post_id: uuid.UUID) -> list[tuple[uuid.UUID, float]]:
+        query = (select(RelatedPost.related_id, RelatedPost.score).
+                 where(RelatedPost.post_id == post_id).
+                 order_by(RelatedPost.score.desc(), RelatedPost.related_id.desc()))
+        res = await self.session.execute(query)
+        return list(res.tuples())
+
+    async def get_document(
+            self, post_id: uuid.UUID) -> tuple[dict, int, datetime] | None:
+        """Rendered document of a post, its version and when it was rendered"""
+        query = (select(PostDocument.document, PostDocument.version,
+                        PostDocument.updated_at).
+                 where(PostDocument.post_id == post_id))
+        res = await self.session.execute(query)
+        row = res.one_or_none()
+        return None if row is None else tuple(row)
+
+    async def get_document_stamp(
+            self, post_id: uuid.UUID) -> tuple[int, datetime] | None:
+        """Version and render time of a post's document, without the document"""
+        query = (select(PostDocument.version, PostDocument.updated_at).
+                 where(PostDocument.post_id == post_id))
+        res = await self.session.execute(query)
+        row = res.one_or_none()
+        return None if row is None else tuple(row)
+
+    async def get_documents(
+            self, post_ids: list[uuid.UUID]) -> dict[uuid.UUID, dict]:
+        query = (select(PostDocument.post_id, PostDocument.document).
+                 where(PostDocument.post_id.in_(post_ids)))
+        res = await self.session.execute(query)
+        return dict(res.all())
+
+    async def get_ids_after(
+            self, after: uuid.UUID | None, limit: int) -> list[uuid.UUID]:
+        query = select(self.model.id).order_by(self.model.id).limit(limit)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        res = await self.session.execute(query)
+        return list(res.scalars())
+
+    async def create_posts(
+            self, posts: list[dict[str, Any]], links: list[dict[str, Any]]):
+        await self.session.execute(insert(self.model), posts)
+        if links:
+            await self.session.execute(insert(self.association_table), links)
+
+    async def get_post_ids(
+            self, specification: Specification) -> list[uuid.UUID]:
+        query, params = select_by(self.model, specification, self.model.id)
+        res = await self.session.execute(query, params)
+        return list(res.scalars())
+
     @staticmethod
     async def add_tags(post: Post, tags: list[Tag]):
         await post.tags.extend(tags)
 
-    async def get_posts_by_tag(self, tag: str):
+    def _posts_by_tag(self, tag: str, since: datetime | None) -> Select:
         query = (select(self.model.id).
                  join_from(self.model, self.association_table).
                  join_from(self.association_table, Tag).
                  filter(Tag.name == tag))
-        res = await self.session.execute(query)
+        if since is not None:
+            # bound both sides of the join so post partitions get pruned
+            lower = uuid7_lower_bound(since)
+            query = query.filter(
+                self.model.id >= lower,
+                self.association_table.c.post_id >= lower
+            )
+        return query
+
+    async def get_posts_by_tag(self, tag: str, since: datetime | None = None):
+        res = await self.session.execute(self._posts_by_tag(tag, since))
         return res.all()
 
-    async def get_posts_by_category(self, category_id: int):
+    async def stream_posts_by_tag(
+            self, tag: str, since: datetime | None = None,
+            batch_size: int = 10_000) -> AsyncIterator[list[uuid.UUID]]:
+        """Post ids of a tag in batches, read through a server-side cursor"""
+        query = self._posts_by_tag(tag, since).execution_options(
+            yield_per=batch_size
+        )
+        res = await self.session.stream_scalars(query)
+        async for batch in res.partitions():
+            yield batch
+
+    async def get_tag_version(self, tag: str) -> int:
+        """Version stamp of a tag, moved by every write to its posts"""
+        res = await self.session.execute(
+            select(Tag.version).where(Tag.name == tag)
+        )
+        return res.scalar_one_or_none() or 0
+
+    async def bump_versions(self, condition: ColumnElement) -> None:
+        """Move the version stamps of the categories and tags of matching posts.
+
+        Runs in the transaction that writes the posts, while their tag
+        links exist. Stamp rows are locked in id order so concurrent writers
+        do not deadlock on them.
+        """
+        categories = select(self.model.category_id).where(condition)
+        tags = (select(self.association_table.c.tag_id).
+                join_from(self.model, self.association_table).
+                where(condition))
+        for model, ids in ((Category, categories), (Tag, tags)):
+            locked = (select(model.id).
+                      where(model.id.in_(ids)).
+                      order_by(model.id).
+                      # FOR NO KEY UPDATE, new posts hold a key share on
+                      # their category through the foreign key
+                      with_for_update(key_share=True).
+                      subquery())
+            await self.session.execute(
+                update(model).
+                where(model.id == locked.c.id).
+                values(version=model.version + 1).
+                execution_options(synchronize_session=False)
+            )
+
+    async def delete_posts(self, condition: ColumnElement) -> int:
+        """Delete matching posts with set-based statements.
+
+        The posts are locked first, in id order: a concurrent delete of the
+        same posts waits for this one to commit, then finds them gone and
+        counts nothing for them. Rows are then taken in the order the create
+        paths take them: neighbour lists, blobs, author counters, version
+        stamps. Blob references are released, and the S3 keys that are no
+        longer used are queued in media_deletion for the sweeper.
+        """
+        posts = select(self.model.id).where(condition)
+        # its own statement, a locking subquery runs only when its outer
+        # query needs it, and the media delete does not without media rows
+        await self.session.execute(
+            posts.order_by(self.model.id).with_for_update()
+        )
+        # the cascade would reach these last, after the counters a new post
+        # trimming the same neighbour lists is about to take
+        await self.session.execute(
+            delete(RelatedPost).
+            where(or_(RelatedPost.post_id.in_(posts), RelatedPost.related_id.in_(posts))).
+            execution_options(synchronize_session=False)
+        )
+        gone = (delete(Media).
+                where(Media.post_id.in_(posts)).
+                returning(Media.id, Media.media_type, Media.blob_hash).
+                cte("gone"))
+        counts = (select(gone.c.blob_hash, func.count().label("n")).
+                  where(gone.c.blob_hash.is_not(None)).
+                  group_by(gone.c.blob_hash).
+                  cte("counts"))
+        released = (update(Blob).
+                    where(Blob.hash == counts.c.blob_hash).
+                    values(ref_count=Blob.ref_count - counts.c.n).
+                    returning(Blob.hash, Blob.ref_count).
+                    cte("released"))
+        keys = union_all(
+            select(released.c.hash).where(released.c.ref_count <= 0),
+            select(cast(gone.c.id, String) + gone.c.media_type).
+            where(gone.c.blob_hash.is_(None)),
+        )
+        stmt = (pg_insert(MediaDeletion).
+                from_select(["key"], keys).
+                on_conflict_do_nothing().
+                returning(MediaDeletion.key))
+        queued = list((await self.session.execute(stmt)).scalars())
+        if queued:
+            await self.session.execute(
+                delete(Blob).where(
+                    Blob.hash == any_(bindparam("hashes", queued, type_=ARRAY(String))),
+                    Blob.ref_count <= 0
+                )
+            )
+        # counters before stamps, the order the create paths lock them in
+        stats = AuthorStatsRepo(self.session)
+        authors = await stats.remove_posts(condition)
+        await self.bump_versions(condition)
+        await self.session.execute(
+            delete(self.association_table).
+            where(self.association_table.c.post_id.in_(posts))
+        )
+        res = await self.session.execute(delete(self.model).where(condition))
+        await stats.refresh_last_posts(authors)
+        return res.rowcount
+
+    async def get_posts_by_tags(
+            self,
+            tag_ids: list[uuid.UUID],
+            match_all: bool,
+            exclude_ids: list[uuid.UUID],
+            before: uuid.UUID | None,
+            limit: int) -> list[uuid.UUID]:
+        """Newest first post ids by tag ids, keyset paginated by post id.
+
+        Candidates are read from the (tag_id, post_id) index in id order and
+        every other condition is an EXISTS probe on the primary key, so a
+        page stops scanning once it has `limit` rows.
+        """
+        table = self.association_table
+
+        def has_tag(post_id, tag_id):
+            other = table.alias()
+            return exists().where(
+                other.c.post_id == post_id, other.c.tag_id == tag_id
+            )
+
+        def tagged(tag_id, required=()):
+            driver = table.alias()
+            query = select(driver.c.post_id).where(
+                driver.c.tag_id == tag_id,
+                *(has_tag(driver.c.post_id, t) for t in required),
+                *(~has_tag(driver.c.post_id, t) for t in exclude_ids),
+            )
+            if before is not None:
+                query = query.where(driver.c.post_id < before)
+            return query.order_by(driver.c.post_id.desc()).limit(limit)
+
+        if match_all:
+            first, *rest = tag_ids
+            query = tagged(first, rest)
+        else:
+            candidates = union(*(tagged(t) for t in tag_ids)).subquery()
+            query = (select(candidates.c.post_id).
+                     order_by(candidates.c.post_id.desc()).
+                     limit(limit))
+        res = await self.session.execute(query)
+        return list(res.scalars())
+
+    def _posts_by_category(
+            self, category_id: int, since: datetime | None) -> Select:
         query = (select(self.model.id).
                  join(self.model.category).
                  filter(self.model.category_id == category_id))
-        res = await self.session.execute(query)
+        if since is not None:
+            query = query.filter(self.model.id >= uuid7_lower_bound(since))
+        return query
+
+    async def get_posts_by_category(
+            self, category_id: int, since: datetime | None = None):
+        res = await self.session.execute(
+            self._posts_by_category(category_id, since)
+        )
         return res.all()
 
+    async def stream_posts_by_category(
+            self, category_id: int, since: datetime | None = None,
+            batch_size: int = 10_000) -> AsyncIterator[list[uuid.UUID]]:
+        """Post ids of a category in batches, read through a server-side cursor"""
+        query = self._posts_by_category(category_id, since).execution_options(
+            yield_per=batch_size
+        )
+        res = await self.session.stream_scalars(query)
+        async for batch in res.partitions():
+            yield batch
+
+    async def get_category_version(self, category_id: int) -> int:
+        """Version stamp of a category, moved by every write to its posts"""
+        res = await self.session.execute(
+            select(Category.version).where(Category.id == category_id)
+        )
+        return res.scalar_one_or_none() or 0
+
 
 class CategoryRepo:
     def __init__(self, session: AsyncSession):
@@ -80,6 +538,18 @@ class CategoryRepo:
         await self.session.commit()
         return res.one()
 
+    async def get_categories(self) -> list[Category]:
+        query = select(self.model).options(noload(self.model.posts))
+        res = await self.session.execute(query)
+        return list(res.scalars())
+
+    async def get_version(self) -> tuple[int, int]:
+        query = select(
+            func.count(self.model.id), func.coalesce(func.max(self.model.id), 0)
+        )
+        res = await self.session.execute(query)
+        return tuple(res.one())
+
     async def get_category(self, id: int) -> Category:
         query = select(self.model).filter_by(id=id)
         res = await self.session.execute(query)
@@ -93,12 +563,30 @@ class AuthorRepo:
 
     async def get_author(
             self, specification: Specification) -> Author | None:
-        query = select(self.model).filter_by(
-            **specification.is_specified()
+        query, params = select_by(self.model, specification)
+        # Author.posts is selectin, it would load every post of the author
+        res = await self.session.execute(
+            query.options(noload(self.model.posts)), params
         )
-        res = await self.session.execute(query)
         return res.scalar_one_or_none()
 
+    async def is_taken(self, specification: Specification) -> bool:
+        query, params = select_by(self.model, specification, self.model.id)
+        res = await self.session.execute(query, params)
+        return res.first() is not None
+
+    async def count_authors(self) -> int:
+        res = await self.session.execute(select(func.count(self.model.id)))
+        return res.scalar_one()
+
+    async def stream_logins(
+            self, batch_size: int = 10_000) -> AsyncIterator[tuple[str, str]]:
+        query = (select(self.model.username, self.model.email).
+                 execution_options(yield_per=batch_size))
+        res = await self.session.stream(query)
+        async for username, email in res:
+            yield username, email
+
     async def is_author_exists(self, schema: AuthorCreateDTO) -> bool:
         query = select(self.model).where(or_(
             self.model.username == schema.username,
@@ -121,16 +609,146 @@ class AuthorRepo:
             self.model.name)
 
         res = await self.session.execute(stmt)
-        await self.session.commit()
         return res.one()
 
+    async def delete_author(self, author_id: uuid.UUID) -> bool:
+        await PostRepo(self.session).delete_posts(Post.author_id == author_id)
+        res = await self.session.execute(
+            delete(self.model).where(self.model.id == author_id)
+        )
+        return res.rowcount > 0
+
     async def get_hashed_password(
             self, specification: Specification) -> str:
-        query = (select(self.model.hashed_password).
-                 filter_by(**specification.is_specified()))
+        query, params = select_by(
+            self.model, specification, self.model.hashed_password
+        )
+        res = await self.session.execute(query, params)
+        return res.scalar_one()
+
 
+class AuthorStatsRepo:
+    """Per-author post counters, adjusted by the posts added or removed.
+
+    A write costs one upsert per counter table for its posts, a read is
+    a few index lookups however many posts the author has.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.model: Type[AuthorStats] = AuthorStats
+
+    async def add_posts(self, condition: ColumnElement) -> None:
+        """Count matching posts, call after they and their tags are written"""
+        newest = cast(func.max(cast(Post.id, String)), Uuid)
+        stmt = pg_insert(self.model).from_select(
+            ["author_id", "posts", "last_post_id"],
+            select(Post.author_id, func.count(), newest).
+            where(condition).
+            group_by(Post.author_id).
+            order_by(Post.author_id)
+        )
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[self.model.author_id],
+            set_={
+                "posts": self.model.posts + stmt.excluded.posts,
+                "last_post_id": func.greatest(
+                    self.model.last_post_id, stmt.excluded.last_post_id
+                ),
+            }
+        ))
+        await self._count_tags_and_categories(condition, 1)
+
+    async def remove_posts(self, condition: ColumnElement) -> list[uuid.UUID]:
+        """Uncount matching posts before they are deleted, returns their authors"""
+        removed = (select(Post.author_id, func.count().label("n")).
+                   where(condition).
+                   group_by(Post.author_id).
+                   subquery())
+        res = await self.session.execute(
+            update(self.model).
+            where(self.model.author_id == removed.c.author_id).
+            values(posts=self.model.posts - removed.c.n).
+            returning(self.model.author_id)
+        )
+        authors = list(res.scalars())
+        await self._count_tags_and_categories(condition, -1)
+        return authors
+
+    async def refresh_last_posts(self, author_ids: list[uuid.UUID]) -> None:
+        """Repoint authors whose newest post was deleted to the newest one left"""
+        if not author_ids:
+            return
+        newest = (select(Post.id).
+                  where(Post.author_id == self.model.author_id).
+                  order_by(Post.id.desc()).
+                  limit(1).
+                  scalar_subquery())
+        await self.session.execute(
+            update(self.model).
+            where(self.model.author_id.in_(author_ids),
+                  ~exists().where(Post.id == self.model.last_post_id)).
+            values(last_post_id=newest)
+        )
+
+    async def _count_tags_and_categories(
+            self, condition: ColumnElement, sign: int) -> None:
+        # ordered by key so concurrent writers lock counter rows in the same order
+        tags = (select(Post.author_id, post_tag.c.tag_id, func.count() * sign).
+                join_from(Post, post_tag).
+                where(condition).
+                group_by(Post.author_id, post_tag.c.tag_id).
+                order_by(Post.author_id, post_tag.c.tag_id))
+        categories = (select(Post.author_id, Post.category_id, func.count() * sign).
+                      where(condition).
+                      group_by(Post.author_id, Post.category_id).
+                      order_by(Post.author_id, Post.category_id))
+        for model, key, query in ((AuthorTag, AuthorTag.tag_id, tags),
+                                  (AuthorCategory, AuthorCategory.category_id, categories)):
+            stmt = pg_insert(model).from_select(["author_id", key.key, "posts"], query)
+            await self.session.execute(stmt.on_conflict_do_update(
+                index_elements=[model.author_id, key],
+                set_={"posts": model.posts + stmt.excluded.posts}
+            ))
+            if sign < 0:
+                await self.session.execute(
+                    delete(model).where(
+                        model.author_id.in_(select(Post.author_id).where(condition)),
+                        model.posts <= 0
+                    )
+                )
+
+    async def get_stats(
+            self, author_id: uuid.UUID
+    ) -> tuple[str, str, int, uuid.UUID | None] | None:
+        """Username, name, post count and newest post id, None without the author"""
+        query = (select(Author.username, Author.name,
+                        func.coalesce(self.model.posts, 0), self.model.last_post_id).
+                 outerjoin(self.model, self.model.author_id == Author.id).
+                 where(Author.id == author_id))
         res = await self.session.execute(query)
-        return res.scalar_one()
+        row = res.one_or_none()
+        return None if row is None else tuple(row)
+
+    async def get_top_tags(
+            self, author_id: uuid.UUID, limit: int) -> list[tuple[str, int]]:
+        query = (select(Tag.name, AuthorTag.posts).
+                 join_from(AuthorTag, Tag).
+                 where(AuthorTag.author_id == author_id).
+                 order_by(AuthorTag.posts.desc(), Tag.name).
+                 limit(limit))
+        res = await self.session.execute(query)
+        return list(res.tuples())
+
+    async def get_top_categories(
+            self, author_id: uuid.UUID, limit: int) -> list[tuple[int, str, int]]:
+        query = (select(Category.id, Category.name, AuthorCategory.posts).
+                 join_from(AuthorCategory, Category).
+                 where(AuthorCategory.author_id == author_id).
+                 order_by(AuthorCategory.posts.desc(), Category.id).
+                 limit(limit))
+        res = await self.session.execute(query)
+        return list(res.tuples())
 
 
 class MediaRepo:
@@ -139,6 +757,149 @@ class MediaRepo:
         self.model: Type[Media] = Media
 
     async def get_media(self, media_id: uuid.UUID) -> Media:
-        query = select(self.model).filter_by(id=media_id)
-        res = await self.session.execute(query)
+        query, params = select_by(self.model, IDSpecification(media_id))
+        res = await self.session.execute(query, params)
         return res.scalar_one()
+
+    async def get_medias(self, specification: Specification) -> list[Media]:
+        query, params = select_by(self.model, specification)
+        res = await self.session.execute(query, params)
+        return list(res.scalars())
+
+    async def get_storage_keys(self) -> set[str]:
+        query = union_all(
+            select(Blob.hash),
+            select(cast(self.model.id, String) + self.model.media_type).
+            where(self.model.blob_hash.is_(None)),
+        ).execution_options(yield_per=10_000)
+        res = await self.session.stream(query)
+        return {key async for key in res.scalars()}
+
+    async def dedup_stats(self) -> DedupStatsDTO:
+        media_query = select(func.count(self.model.id))
+        blob_query = select(
+            func.count(Blob.hash),
+            func.coalesce(func.sum(Blob.size), 0),
+            func.coalesce(func.sum(Blob.size * Blob.ref_count), 0),
+        )
+        media_count = (await self.session.execute(media_query)).scalar_one()
+        blobs, stored, referenced = (await self.session.execute(blob_query)).one()
+        return DedupStatsDTO(
+            media_count=media_count,
+            blob_count=blobs,
+            stored_bytes=stored,
+            referenced_bytes=referenced,
+        )
+
+
+class BlobRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.model: Type[Blob] = Blob
+
+    async def acquire(self, blob_hash: str, size: int) -> bool:
+        """Take a reference on a blob, returns True if the blob is new"""
+        stmt = pg_insert(self.model).values(
+            hash=blob_hash, size=size, ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.hash],
+            set_={"ref_count": self.model.ref_count + 1}
+        ).returning(self.model.ref_count)
+        res = await self.session.execute(stmt)
+        return res.scalar_one() == 1
+
+
+class MediaDeletionRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.model: Type[MediaDeletion] = MediaDeletion
+
+    async def claim(self, limit: int) -> list[str]:
+        """Lock up to limit queued keys, skipping keys other sweepers hold"""
+        query = (select(self.model.key).
+                 order_by(self.model.queued_at).
+                 limit(limit).
+                 with_for_update(skip_locked=True))
+        res = await self.session.execute(query)
+        return list(res.scalars())
+
+    async def enqueue(self, keys: list[str], batch_size: int = 1000) -> None:
+        for start in range(0, len(keys), batch_size):
+            stmt = pg_insert(self.model).values(
+                [{"key": key} for key in keys[start:start + batch_size]]
+            ).on_conflict_do_nothing()
+            await self.session.execute(stmt)
+
+    async def discard(self, keys: list[str]) -> None:
+        await self.session.execute(
+            delete(self.model).where(self.model.key.in_(keys))
+        )
+
+    async def get_keys(self) -> set[str]:
+        res = await self.session.execute(select(self.model.key))
+        return set(res.scalars())
+
+
+class IdempotencyRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.model: Type[IdempotencyKey] = IdempotencyKey
+
+    def _expired(self) -> ColumnElement[bool]:
+        # a key is claimed and completed in one transaction, so a committed
+        # key without a post is one whose post was deleted
+        return or_(self.model.expires_at < func.now(), self.model.post_id.is_(None))
+
+    async def claim(
+            self, author_id: uuid.UUID, key: str, fingerprint: str,
+            ttl: timedelta) -> bool:
+        """Insert the key unless a live one exists, True when this caller owns it.
+
+        An uncommitted insert of the same key by a concurrent request makes
+        this statement wait until that request commits or rolls back.
+        """
+        stmt = pg_insert(self.model).values(
+            author_id=author_id, key=key, fingerprint=fingerprint,
+            expires_at=func.now() + ttl
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.author_id, self.model.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "post_id": None,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=self._expired(),
+        ).returning(self.model.key)
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none() is not None
+
+    async def get(
+            self, author_id: uuid.UUID, key: str
+    ) -> tuple[uuid.UUID | None, str] | None:
+        """post_id and request fingerprint stored for a key"""
+        query = (select(self.model.post_id, self.model.fingerprint).
+                 where(self.model.author_id == author_id, self.model.key == key))
+        res = await self.session.execute(query)
+        return res.tuples().one_or_none()
+
+    async def complete(
+            self, author_id: uuid.UUID, key: str, post_id: uuid.UUID) -> None:
+        await self.session.execute(
+            update(self.model).
+            where(self.model.author_id == author_id, self.model.key == key).
+            values(post_id=post_id)
+        )
+
+    async def purge_expired(self, batch_size: int = 10_000) -> int:
+        expired = (select(self.model.author_id, self.model.key).
+                   where(self._expired()).
+                   limit(batch_size))
+        res = await self.session.execute(
+            delete(self.model).
+            where(tuple_(self.model.author_id, self.model.key).in_(expired),
+                  # checked again on a key claimed anew while this waited
+                  self._expired())
+        )
+        return res.rowcount
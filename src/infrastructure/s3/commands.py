@@ -1,42 +1,78 @@
-import os
+import asyncio
 import io
 import mimetypes
-from uuid import UUID
-from dotenv import load_dotenv
+from datetime import datetime
+from typing import AsyncIterator
 
-from src.infrastructure.s3.factory import get_s3_session
+from src.infrastructure.s3.config import get_s3_config
+from src.infrastructure.s3.factory import s3_client
 
 from fastapi.responses import StreamingResponse
 
-load_dotenv()
 
+_uploads: set[asyncio.Task] = set()
 
-async def s3_media_upload(
-        file, key: UUID, ext: str
-) -> None:
-    session = get_s3_session()
-    async with session.client('s3') as s3:
+
+async def drain_uploads(timeout: float) -> None:
+    """Wait for uploads still in flight, e.g. before closing the client"""
+    if _uploads:
+        await asyncio.wait(set(_uploads), timeout=timeout)
+
+
+async def s3_media_upload(file, key: str) -> None:
+    task = asyncio.current_task()
+    _uploads.add(task)
+    try:
+        await _put_object(file, key)
+    finally:
+        _uploads.discard(task)
+
+
+async def _put_object(file, key: str) -> None:
+    async with s3_client() as s3:
         await s3.put_object(
             ACL="bucket-owner-full-control",
             Body=file,
-            Bucket=os.environ["AWS_S3_BUCKET"],
+            Bucket=get_s3_config().AWS_S3_BUCKET,
             ContentEncoding="UTF-8",
-            Key=str(key) + ext,
+            Key=key,
+        )
+
+
+DELETE_BATCH_SIZE = 1000
+
+
+async def s3_delete_objects(keys: list[str]) -> list[str]:
+    """Delete up to DELETE_BATCH_SIZE keys at once, returns the keys that failed"""
+    async with s3_client() as s3:
+        response = await s3.delete_objects(
+            Bucket=get_s3_config().AWS_S3_BUCKET,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
         )
+    return [error["Key"] for error in response.get("Errors", [])]
+
 
+async def s3_list_keys() -> AsyncIterator[tuple[str, datetime]]:
+    async with s3_client() as s3:
+        paginator = s3.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=get_s3_config().AWS_S3_BUCKET):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["LastModified"]
 
-async def s3_get_media(key: UUID, ext: str) -> StreamingResponse:
-    session = get_s3_session()
-    file_name = str(key) + ext
-    async with session.client("s3") as s3:
+
+async def s3_get_object(key: str) -> bytes:
+    async with s3_client() as s3:
         response = await s3.get_object(
-            Bucket=os.environ["AWS_S3_BUCKET"],
-            Key=file_name
+            Bucket=get_s3_config().AWS_S3_BUCKET,
+            Key=key
         )
         async with response["Body"] as stream:
-            content = await stream.read()
-            content_type = mimetypes.guess_type(file_name)
-            return StreamingResponse(
-                io.BytesIO(content),
-                media_type=content_type[0]
-            )
+            return await stream.read()
+
+
+def media_response(content: bytes, ext: str) -> StreamingResponse:
+    content_type = mimetypes.guess_type("media" + ext)
+    return StreamingResponse(
+        io.BytesIO(content),
+        media_type=content_type[0]
+    )
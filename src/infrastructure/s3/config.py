@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class S3Config(BaseSettings):
+    AWS_REGION_NAME: str
+    AWS_ACCESS_KEY_ID: str
+    AWS_SECRET_ACCESS_KEY: str
+    AWS_S3_BUCKET: str
+    AWS_S3_MAX_POOL_CONNECTIONS: int = 10
+
+    model_config = SettingsConfigDict(
+        env_file=".env.non-dev", env_file_encoding="utf-8", extra="ignore"
+    )
+
+
+@lru_cache
+def get_s3_config() -> S3Config:
+    return S3Config()
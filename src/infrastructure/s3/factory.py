@@ -1,32 +1,60 @@
-import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
 import aioboto3
-from dotenv import load_dotenv
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from boto3.session import Session
 
-load_dotenv()
+from src.infrastructure.s3.config import get_s3_config
+
+_client: Any = None
 
 
 def get_s3_session():
+    config = get_s3_config()
     return aioboto3.Session(
-        region_name=os.environ["AWS_REGION_NAME"],
-        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+        region_name=config.AWS_REGION_NAME,
+        aws_access_key_id=config.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=config.AWS_SECRET_ACCESS_KEY,
+    )
+
+
+def _client_config() -> Config:
+    return Config(
+        max_pool_connections=get_s3_config().AWS_S3_MAX_POOL_CONNECTIONS
     )
 
 
-def exist_bucket():
-    s3_client = Session(
-        region_name=os.environ["AWS_REGION_NAME"],
-        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"]
-    ).client('s3')
-    try:
-        s3_client.head_bucket(Bucket=os.environ["AWS_S3_BUCKET"])
-    except ClientError:
-        s3_client.create_bucket(
-            Bucket=os.environ["AWS_S3_BUCKET"],
-            CreateBucketConfiguration={
-                'LocationConstraint': os.environ["AWS_REGION_NAME"]
-            }
-        )
+@asynccontextmanager
+async def open_s3_client() -> AsyncIterator[Any]:
+    """Keep one client, and its connection pool, for the app lifetime"""
+    global _client
+    async with get_s3_session().client("s3", config=_client_config()) as s3:
+        _client = s3
+        try:
+            yield s3
+        finally:
+            _client = None
+
+
+@asynccontextmanager
+async def s3_client() -> AsyncIterator[Any]:
+    if _client is not None:
+        yield _client
+        return
+    async with get_s3_session().client("s3", config=_client_config()) as s3:
+        yield s3
+
+
+async def exist_bucket() -> None:
+    config = get_s3_config()
+    async with s3_client() as s3:
+        try:
+            await s3.head_bucket(Bucket=config.AWS_S3_BUCKET)
+        except ClientError:
+            await s3.create_bucket(
+                Bucket=config.AWS_S3_BUCKET,
+                CreateBucketConfiguration={
+                    'LocationConstraint': config.AWS_REGION_NAME
+                }
+            )
@@ -0,0 +1,44 @@
+import os
+from functools import lru_cache
+
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ServerConfig(BaseSettings):
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 5000
+    # one per cpu by default, as many as the DB_POOL_BUDGET allows
+    WEB_WORKERS: int | None = Field(default=None, ge=1)
+    DB_POOL_BUDGET: int = 15
+    S3_POOL_BUDGET: int = 40
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    # X-Admin-Token of the admin author deletion, the route is hidden without it
+    ADMIN_TOKEN: str | None = None
+
+    model_config = SettingsConfigDict(
+        env_file=".env.non-dev", env_file_encoding="utf-8", extra="ignore"
+    )
+
+    @model_validator(mode="after")
+    def check_pool_budget(self) -> "ServerConfig":
+        # every worker holds a LISTEN connection and at least one pooled one
+        if self.DB_POOL_BUDGET < 2:
+            raise ValueError("DB_POOL_BUDGET must be at least 2")
+        if self.WEB_WORKERS is not None and self.WEB_WORKERS * 2 > self.DB_POOL_BUDGET:
+            raise ValueError(
+                f"{self.WEB_WORKERS} workers need at least {self.WEB_WORKERS * 2} "
+                f"database connections, DB_POOL_BUDGET is {self.DB_POOL_BUDGET}"
+            )
+        return self
+
+    @property
+    def workers(self) -> int:
+        if self.WEB_WORKERS is not None:
+            return self.WEB_WORKERS
+        return max(1, min(os.cpu_count() or 1, self.DB_POOL_BUDGET // 2))
+
+
+@lru_cache
+def get_server_config() -> ServerConfig:
+    return ServerConfig()
@@ -0,0 +1,61 @@
+import hmac
+import uuid
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.author import _delete_author
+from src.infrastructure.database.repo import AuthorRepo
+from src.presentation.config import get_server_config
+from src.presentation.providers.stub import Stub
+
+from src.presentation.profiling import get_profiling_config
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _check_token(secret: str | None, token: str | None) -> None:
+    if secret is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    if token is None or not hmac.compare_digest(secret, token):
+        raise HTTPException(status.HTTP_403_FORBIDDEN)
+
+
+def require_profiler(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    _check_token(get_profiling_config().PROFILE_SECRET, x_admin_token)
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    _check_token(get_server_config().ADMIN_TOKEN, x_admin_token)
+
+
+@admin_router.get("/profiles", dependencies=[Depends(require_profiler)])
+async def list_profiles(request: Request) -> list[dict[str, Any]]:
+    return [p.summary() for p in reversed(request.app.state.profiles)]
+
+
+@admin_router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiler)])
+async def download_profile(profile_id: str, request: Request) -> PlainTextResponse:
+    for profile in request.app.state.profiles:
+        if profile.id == profile_id:
+            return PlainTextResponse(
+                profile.report(),
+                headers={
+                    "Content-Disposition": f'attachment; filename="{profile_id}.txt"'
+                },
+            )
+    raise HTTPException(status.HTTP_404_NOT_FOUND, detail="profile not found")
+
+
+@admin_router.delete(
+    "/authors/{author_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin)]
+)
+async def delete_author(
+        author_id: uuid.UUID,
+        session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+) -> None:
+    await _delete_author(AuthorRepo(session), author_id)
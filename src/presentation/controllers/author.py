@@ -6,9 +6,11 @@ from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.schemas import Token
-from src.app.schemas import AuthorCreateDTO, AuthorOutDTO
-from src.app.author import _create_author, _get_author, authenticate_author
-from src.infrastructure.database.repo import AuthorRepo
+from src.app.schemas import AuthorCreateDTO, AuthorOutDTO, AvailabilityDTO, AuthorSummaryDTO
+from src.app.author import (
+    _create_author, _get_author, _check_availability, _delete_author,
+    _get_author_summary, authenticate_author, get_current_author)
+from src.infrastructure.database.repo import AuthorRepo, AuthorStatsRepo
 from src.presentation.providers.stub import Stub
 
 author_router = APIRouter(prefix="/authors", tags=["authors"])
@@ -30,3 +32,28 @@ async def login(
         form_data.username, AuthorRepo(session), form_data.password
     )
     return {"token_type": "bearer", "access_token": token}
+
+
+@author_router.get("/availability", status_code=status.HTTP_200_OK)
+async def check_availability(
+        session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        username: str | None = None,
+        email: str | None = None,
+) -> AvailabilityDTO:
+    return await _check_availability(AuthorRepo(session), username, email)
+
+
+@author_router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_me(
+        author_id: Annotated[uuid.UUID, Depends(get_current_author)],
+        session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+) -> None:
+    await _delete_author(AuthorRepo(session), author_id)
+
+
+@author_router.get("/{author_id}/summary", status_code=status.HTTP_200_OK)
+async def get_author_summary(
+        author_id: uuid.UUID,
+        session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+) -> AuthorSummaryDTO:
+    return await _get_author_summary(AuthorStatsRepo(session), author_id)
@@ -0,0 +1,34 @@
+import os
+from typing import Any
+
+from fastapi import APIRouter, Request, Response, status
+
+from src.presentation.lifespan import memory_usage
+
+health_router = APIRouter(prefix="/health", tags=["health"])
+
+
+@health_router.get("/live", status_code=status.HTTP_200_OK)
+async def live() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def ready(request: Request, response: Response) -> dict[str, bool]:
+    readiness = request.app.state.readiness
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness.components
+
+
+@health_router.get("/worker", status_code=status.HTTP_200_OK)
+async def worker() -> dict[str, int]:
+    return {"pid": os.getpid(), **memory_usage()}
+
+
+@health_router.get("/limits", status_code=status.HTTP_200_OK)
+async def limits(request: Request) -> dict[str, dict[str, Any]]:
+    return {
+        name: limiter.stats()
+        for name, limiter in request.app.state.limiters.items()
+    }
@@ -1,16 +1,26 @@
 import pathlib
 import uuid
-from typing import Annotated, List, Optional
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, UploadFile, File, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, UploadFile, File, Query, Request, \
+    Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.app.post import _create_category, _get_posts_by_category, create_post_fully, _get_post, _get_media, \
-    _get_posts_by_tag
-from src.app.schemas import CreatePostDTO, TagDTO, CategoryDTO, PostOutDTO
+    _get_posts_by_tag, _get_dedup_stats, _get_categories, create_posts_batch, _get_posts_by_tags, \
+    stream_posts, _delete_posts, _get_posts, _get_post_stamp, _get_category_version, \
+    _get_tag_version, _get_related_posts, _stream_posts_by_category, _stream_posts_by_tag
+from src.app.schemas import CreatePostDTO, TagDTO, CategoryDTO, PostOutDTO, DedupStatsDTO, BatchPostDTO, \
+    PostPageDTO, RelatedPostDTO, TagName, MAX_POST_TAGS
 from src.app.author import get_current_author
-from src.infrastructure.database.repo import CategoryRepo, PostRepo, MediaRepo
+from src.app.pubsub import post_topics
+from src.infrastructure.database.repo import CategoryRepo, PostRepo, MediaRepo, TagRepo
+from src.presentation.caching import (
+    is_conditional, is_fresh, make_etag, not_modified, validators)
 from src.presentation.providers.stub import Stub
+from src.presentation.streaming import stream_json_array
 from src.app.post import s3_put_files
 
 post_router = APIRouter(
@@ -19,19 +29,51 @@ post_router = APIRouter(
 )
 
 
+@post_router.get("/media/stats")
+async def get_media_stats(
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+) -> DedupStatsDTO:
+    return await _get_dedup_stats(MediaRepo(db_session))
+
+
 @post_router.get("/media/{id}")
 async def get_media(
         id: uuid.UUID,
-        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]):
-    return await _get_media(id, MediaRepo(db_session))
+        session_factory: Annotated[
+            async_sessionmaker[AsyncSession], Depends(Stub(async_sessionmaker))]
+):
+    return await _get_media(session_factory, id)
 
 
 @post_router.get("", status_code=200)
 async def get_post(
         post_id: uuid.UUID,
-        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+        request: Request,
+        response: Response,
+        session_factory: Annotated[
+            async_sessionmaker[AsyncSession], Depends(Stub(async_sessionmaker))]
 ) -> PostOutDTO:
-    return await _get_post(PostRepo(db_session), post_id)
+    if is_conditional(request):
+        # a revalidation is answered from the stamp, the document stays unread
+        stamp = await _get_post_stamp(session_factory, post_id)
+        if stamp is not None:
+            version, updated_at = stamp
+            etag = make_etag(post_id.hex, version)
+            if is_fresh(request, etag, updated_at):
+                return not_modified(validators(etag, updated_at))
+    post, stamp = await _get_post(session_factory, post_id)
+    if stamp is not None:
+        version, updated_at = stamp
+        response.headers.update(validators(make_etag(post_id.hex, version), updated_at))
+    return post
+
+
+@post_router.get("/batch", status_code=200)
+async def get_posts(
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        ids: list[uuid.UUID] = Query(max_length=500)
+) -> list[PostOutDTO | None]:
+    return await _get_posts(PostRepo(db_session), ids)
 
 
 @post_router.post("", status_code=201)
@@ -40,13 +82,33 @@ async def create_post(
         author_id: Annotated[uuid.UUID, Depends(get_current_author)],
         db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
         media: list[UploadFile],
-        tags: list[str] = Query(None)
+        tags: list[TagName] = Query(None, max_length=MAX_POST_TAGS),
+        idempotency_key: Annotated[str | None, Header(max_length=255)] = None
 ):
     return await create_post_fully(
-        post, author_id, db_session, media, tags
+        post, author_id, db_session, media, tags, idempotency_key
     )
 
 
+@post_router.delete("", status_code=200)
+async def delete_posts(
+        post_ids: Annotated[list[uuid.UUID], Body(max_length=1000)],
+        author_id: Annotated[uuid.UUID, Depends(get_current_author)],
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+) -> dict[str, int]:
+    deleted = await _delete_posts(PostRepo(db_session), author_id, post_ids)
+    return {"deleted": deleted}
+
+
+@post_router.post("/batch", status_code=201)
+async def create_posts(
+        posts: list[BatchPostDTO],
+        author_id: Annotated[uuid.UUID, Depends(get_current_author)],
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+) -> list[uuid.UUID]:
+    return await create_posts_batch(posts, author_id, db_session)
+
+
 @post_router.post("/category", status_code=201)
 async def create_category(
         category: CategoryDTO,
@@ -56,23 +118,115 @@ async def create_category(
     return {"status": 201}
 
 
+@post_router.get("/categories", status_code=200)
+async def get_categories(
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+) -> list[CategoryDTO]:
+    return await _get_categories(CategoryRepo(db_session))
+
+
+def _split(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return [item for item in value.split(",") if item]
+
+
+@post_router.get("/tags", status_code=200)
+async def get_posts_by_tags(
+        tags: str,
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        mode: Literal["all", "any"] = "all",
+        exclude: str | None = None,
+        after: uuid.UUID | None = None,
+        limit: int = Query(50, ge=1, le=500)
+) -> PostPageDTO:
+    return await _get_posts_by_tags(
+        PostRepo(db_session),
+        TagRepo(db_session),
+        _split(tags),
+        mode == "all",
+        _split(exclude),
+        after,
+        limit
+    )
+
+
+@post_router.get("/stream")
+async def stream_new_posts(
+        category_id: int | None = None,
+        tag: list[str] = Query(None)
+) -> StreamingResponse:
+    if category_id is None and not tag:
+        raise HTTPException(status_code=422, detail="specify category_id or tag")
+    return StreamingResponse(
+        stream_posts(post_topics(category_id, tag or []), heartbeat=15.0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @post_router.get("/{category_id}", status_code=200)
 async def get_posts_by_category(
         category_id: int,
-        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+        request: Request,
+        response: Response,
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        session_factory: Annotated[
+            async_sessionmaker[AsyncSession], Depends(Stub(async_sessionmaker))],
+        since: datetime | None = None,
+        stream: bool = False
 ):
+    repo = PostRepo(db_session)
+    etag = make_etag(await _get_category_version(repo, category_id))
+    if is_fresh(request, etag):
+        return not_modified(validators(etag))
+    if stream:
+        return await stream_json_array(
+            request,
+            _stream_posts_by_category(session_factory, category_id, since),
+            validators(etag)
+        )
+    response.headers.update(validators(etag))
     return await _get_posts_by_category(
-        PostRepo(db_session),
-        category_id
+        repo,
+        category_id,
+        since
     )
 
 
 @post_router.get("/tag/{tag_name}", status_code=200)
 async def get_posts_by_tag(
         tag_name: str,
-        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+        request: Request,
+        response: Response,
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        session_factory: Annotated[
+            async_sessionmaker[AsyncSession], Depends(Stub(async_sessionmaker))],
+        since: datetime | None = None,
+        stream: bool = False
 ):
+    repo = PostRepo(db_session)
+    etag = make_etag(await _get_tag_version(repo, tag_name))
+    if is_fresh(request, etag):
+        return not_modified(validators(etag))
+    if stream:
+        return await stream_json_array(
+            request,
+            _stream_posts_by_tag(session_factory, tag_name, since),
+            validators(etag)
+        )
+    response.headers.update(validators(etag))
     return await _get_posts_by_tag(
-        PostRepo(db_session),
-        tag_name
+        repo,
+        tag_name,
+        since
     )
+
+
+# after /tag/{tag_name}, so a tag named "related" still reaches that route
+@post_router.get("/{post_id}/related", status_code=200)
+async def get_related_posts(
+        post_id: uuid.UUID,
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))]
+) -> list[RelatedPostDTO]:
+    return await _get_related_posts(PostRepo(db_session), post_id)
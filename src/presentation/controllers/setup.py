@@ -1,9 +1,15 @@
 from fastapi import FastAPI
 
+from src.presentation.controllers.admin import admin_router
 from src.presentation.controllers.author import author_router
+from src.presentation.controllers.health import health_router
 from src.presentation.controllers.post import post_router
+from src.presentation.controllers.tag import tag_router
 
 
 def setup_controllers(app: FastAPI) -> None:
     app.include_router(author_router)
-    app.include_router(post_router)
\ No newline at end of file
+    app.include_router(post_router)
+    app.include_router(tag_router)
+    app.include_router(health_router)
+    app.include_router(admin_router)
@@ -0,0 +1,23 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.schemas import TagSuggestionDTO
+from src.app.tag import TOP_K, _suggest_tags
+from src.infrastructure.database.repo import TagRepo
+from src.presentation.providers.stub import Stub
+
+tag_router = APIRouter(
+    prefix="/tags",
+    tags=['tags']
+)
+
+
+@tag_router.get("/suggest", status_code=200)
+async def suggest_tags(
+        db_session: Annotated[AsyncSession, Depends(Stub(AsyncSession))],
+        prefix: str = Query(min_length=1, max_length=40),
+        limit: int = Query(10, ge=1, le=TOP_K)
+) -> list[TagSuggestionDTO]:
+    return await _suggest_tags(TagRepo(db_session), prefix, limit)
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import resource
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import FastAPI
+
+from src.app.author import login_filter, publish_author_created
+from src.app.category import category_registry
+from src.app.post import (
+    publish_created, purge_idempotency_keys, sweep_media_deletions)
+from src.app.tag import tag_index
+from src.infrastructure.database.factory import (
+    dispose_engine, get_engine, get_sessionmaker, warm_db_pool)
+from src.infrastructure.database.notifications import (
+    AUTHOR_CREATED, POST_CREATED, listen)
+from src.infrastructure.database.partitions import ensure_post_partitions
+from src.infrastructure.database.repo import AuthorRepo, CategoryRepo, TagRepo
+from src.infrastructure.s3.commands import drain_uploads
+from src.infrastructure.s3.factory import exist_bucket, open_s3_client
+from src.presentation.config import get_server_config
+from src.presentation.profiling import get_profiling_config, install_s3_hooks
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+PARTITION_CHECK_INTERVAL = 24 * 60 * 60
+SWEEP_INTERVAL = 10.0
+TAG_INDEX_INTERVAL = 60 * 60
+LOGIN_FILTER_INTERVAL = 60 * 60
+PURGE_INTERVAL = 60 * 60
+
+
+def memory_usage() -> dict[str, int]:
+    """Resident and peak resident memory of this worker in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        rss = peak
+    return {"rss": rss, "peak_rss": peak}
+
+
+class Readiness:
+    def __init__(self, *components: str) -> None:
+        self.components = {name: False for name in components}
+
+    @property
+    def ready(self) -> bool:
+        return all(self.components.values())
+
+
+async def _warm_up(
+        readiness: Readiness,
+        name: str,
+        warm: Callable[[], Awaitable[None]]
+) -> None:
+    delay = RETRY_DELAY
+    while True:
+        try:
+            await warm()
+        except Exception:
+            logger.exception("%s is not ready, retrying in %ss", name, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+        else:
+            readiness.components[name] = True
+            return
+
+
+async def _run_periodically(
+        interval: float,
+        job: Callable[[], Awaitable[None]],
+        delay: float = 0.0
+) -> None:
+    await asyncio.sleep(delay)
+    while True:
+        try:
+            await job()
+        except Exception:
+            logger.exception("periodic job %s failed", job.__name__)
+        await asyncio.sleep(interval)
+
+
+async def create_post_partitions() -> None:
+    await ensure_post_partitions(get_engine())
+
+
+async def sweep_media() -> None:
+    while True:
+        async with get_sessionmaker()() as session:
+            if not await sweep_media_deletions(session):
+                return
+
+
+async def purge_idempotency() -> None:
+    while True:
+        async with get_sessionmaker()() as session:
+            if not await purge_idempotency_keys(session):
+                return
+
+
+async def load_login_filter() -> None:
+    async with get_sessionmaker()() as session:
+        await login_filter.load(AuthorRepo(session))
+
+
+async def load_categories() -> None:
+    async with get_sessionmaker()() as session:
+        await category_registry.load(CategoryRepo(session))
+
+
+async def load_tag_index() -> None:
+    async with get_sessionmaker()() as session:
+        await tag_index.load(TagRepo(session))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmups = {
+        "database": warm_db_pool,
+        "s3": exist_bucket,
+        "login_filter": load_login_filter,
+        "categories": load_categories,
+    }
+    readiness = Readiness(*warmups)
+    app.state.readiness = readiness
+    async with AsyncExitStack() as stack:
+        s3 = await stack.enter_async_context(open_s3_client())
+        if get_profiling_config().enabled:
+            install_s3_hooks(s3)
+        stack.push_async_callback(dispose_engine)
+        tasks = [
+            asyncio.create_task(_warm_up(readiness, name, warm))
+            for name, warm in warmups.items()
+        ]
+        tasks.append(asyncio.create_task(_run_periodically(
+            PARTITION_CHECK_INTERVAL, create_post_partitions
+        )))
+        tasks.append(asyncio.create_task(_run_periodically(
+            SWEEP_INTERVAL, sweep_media
+        )))
+        tasks.append(asyncio.create_task(_run_periodically(
+            PURGE_INTERVAL, purge_idempotency
+        )))
+        # counts drift with deletions, rebuild now and then; the first run
+        # happens at startup, suggestions come from the database until then
+        tasks.append(asyncio.create_task(_run_periodically(
+            TAG_INDEX_INTERVAL, load_tag_index
+        )))
+        # a filter missing a signup would call its name available, the
+        # notifications fill it in and the reload catches any that were lost
+        tasks.append(asyncio.create_task(_run_periodically(
+            LOGIN_FILTER_INTERVAL, load_login_filter, delay=LOGIN_FILTER_INTERVAL
+        )))
+        tasks.append(asyncio.create_task(listen({
+            POST_CREATED: publish_created,
+            AUTHOR_CREATED: publish_author_created,
+        })))
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await drain_uploads(get_server_config().GRACEFUL_SHUTDOWN_TIMEOUT)
+            logger.info("worker %s stopping, memory %s", os.getpid(), memory_usage())
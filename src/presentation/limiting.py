@@ -0,0 +1,239 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from src.infrastructure.database.config import get_db_config
+
+
+class LimitingConfig(BaseSettings):
+    CONCURRENCY_LIMITING: bool = True
+    LIMIT_QUEUE_TIMEOUT: float = 2.0
+
+    model_config = SettingsConfigDict(
+        env_file=".env.non-dev", env_file_encoding="utf-8", extra="ignore"
+    )
+
+
+@lru_cache
+def get_limiting_config() -> LimitingConfig:
+    return LimitingConfig()
+
+
+@dataclass(frozen=True)
+class LimiterSettings:
+    initial: int
+    min_limit: int
+    max_limit: int
+    max_queue: int
+    target_latency: float
+
+
+ROUTE_CLASSES = {
+    "auth": LimiterSettings(4, 1, 16, 32, 0.5),
+    "media": LimiterSettings(8, 2, 32, 64, 1.0),
+    "write": LimiterSettings(8, 2, 32, 64, 0.5),
+    "read": LimiterSettings(32, 4, 128, 256, 0.1),
+}
+
+# share of a worker's database pool that streamed listings may hold
+STREAM_POOL_SHARE = 0.5
+STREAM_QUEUE_FACTOR = 4
+
+BACKOFF = 0.9
+LATENCY_SMOOTHING = 0.2
+# the spellings FastAPI reads as true for a bool query parameter
+STREAM_TRUE = {"1", "true", "on", "yes", "y", "t"}
+
+
+def stream_settings(pool_size: int) -> LimiterSettings:
+    """Fixed cap for streamed listings, sized from the database pool.
+
+    A streamed listing runs as long as its client reads and holds a
+    database connection until its last row is sent, so its latency says
+    nothing about load; the limit stays put instead of adapting.
+    """
+    cap = max(1, int(pool_size * STREAM_POOL_SHARE))
+    return LimiterSettings(cap, cap, cap, cap * STREAM_QUEUE_FACTOR, 10.0)
+
+
+def _streamed(query_string: bytes) -> bool:
+    values = parse_qs(query_string.decode("latin-1")).get("stream", [])
+    return any(value.lower() in STREAM_TRUE for value in values)
+
+
+def route_class(method: str, path: str, query_string: bytes = b"") -> str | None:
+    """Limiter a request is admitted through, None for unlimited routes"""
+    if path.startswith(("/health", "/admin")) or path == "/posts/stream":
+        return None
+    if method == "POST" and path in ("/authors", "/authors/login"):
+        return "auth"
+    if method == "GET" and path.startswith("/posts/media/") and path != "/posts/media/stats":
+        return "media"
+    if method in ("GET", "HEAD"):
+        if path.startswith("/posts/") and _streamed(query_string):
+            return "stream"
+        return "read"
+    return "write"
+
+
+class AIMDLimiter:
+    """Concurrency limit that adapts to observed latency.
+
+    Every request finishing under the target latency grows the limit by
+    1 / limit, about one slot per round of requests; a slow or failed one
+    shrinks it by BACKOFF, at most once per target latency so that a single
+    burst is not punished for each of its requests. Requests over the limit
+    wait in a bounded FIFO queue and are handed a slot directly on release.
+    """
+
+    def __init__(self, settings: LimiterSettings) -> None:
+        self.settings = settings
+        self.limit = float(settings.initial)
+        self.in_flight = 0
+        self.rejected = 0
+        self.latency = settings.target_latency
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        return max(1, math.ceil(self.latency * (self.queued + 1) / self.limit))
+
+    async def acquire(self, timeout: float) -> bool:
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.settings.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=timeout)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if waiter.done():
+            return True
+        self._abandon(waiter)
+        self.rejected += 1
+        return False
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # the slot was handed over while the waiter gave up
+            self.release(self.latency, failed=False)
+            return
+        waiter.cancel()
+        self._waiters.remove(waiter)
+
+    def release(self, latency: float, failed: bool) -> None:
+        self.in_flight -= 1
+        self._adjust(latency, failed)
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._waiters.popleft().set_result(None)
+
+    def _adjust(self, latency: float, failed: bool) -> None:
+        settings = self.settings
+        self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        if failed or latency > settings.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease >= settings.target_latency:
+                self._last_decrease = now
+                self.limit = max(settings.min_limit, self.limit * BACKOFF)
+        else:
+            self.limit = min(settings.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "latency": self.latency,
+        }
+
+
+class ConcurrencyLimitMiddleware:
+    """Admit requests through the limiter of their route class.
+
+    Shed requests get a 503 with Retry-After before the application sees
+    them, so they hold no database connection and no S3 stream.
+    """
+
+    def __init__(
+            self, app: Any, config: LimitingConfig, limiters: dict[str, AIMDLimiter]
+    ) -> None:
+        self.app = app
+        self.config = config
+        self.limiters = limiters
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        name = (route_class(scope["method"], scope["path"], scope["query_string"])
+                if scope["type"] == "http" else None)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[name]
+        if not await limiter.acquire(self.config.LIMIT_QUEUE_TIMEOUT):
+            await _shed(send, limiter.retry_after())
+            return
+
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.perf_counter() - started, failed=status >= 500)
+
+
+async def _shed(send: Any, retry_after: int) -> None:
+    body = b'{"detail":"server is overloaded"}'
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def setup_limiting(app: FastAPI) -> None:
+    config = get_limiting_config()
+    app.state.limiters = {}
+    if not config.CONCURRENCY_LIMITING:
+        return
+    classes = {
+        **ROUTE_CLASSES, "stream": stream_settings(get_db_config().DB_POOL_SIZE)
+    }
+    app.state.limiters = {
+        name: AIMDLimiter(settings) for name, settings in classes.items()
+    }
+    app.add_middleware(
+        ConcurrencyLimitMiddleware, config=config, limiters=app.state.limiters
+    )
@@ -1,14 +1,24 @@
+import os
+
 import uvicorn
+from dotenv import load_dotenv
 from fastapi import FastAPI
 
+from src.presentation.config import get_server_config
 from src.presentation.controllers.setup import setup_controllers
+from src.presentation.lifespan import lifespan
+from src.presentation.limiting import setup_limiting
+from src.presentation.profiling import setup_profiling
 from src.presentation.providers.providers import setup_providers
 
 
 def main() -> FastAPI:
-    app = FastAPI()
+    load_dotenv()
+    app = FastAPI(lifespan=lifespan)
     setup_controllers(app)
     setup_providers(app)
+    setup_limiting(app)
+    setup_profiling(app)
     return app
 
 
@@ -16,5 +26,35 @@ def run() -> None:
     uvicorn.run(r"main:main", reload=True, port=5000)
 
 
+def split_pool_budget(budget: int, workers: int) -> int:
+    """Per-worker share of a connection budget, at least one connection"""
+    return max(1, budget // workers)
+
+
+def run_production() -> None:
+    load_dotenv()
+    # refuses to start when the workers cannot fit in DB_POOL_BUDGET
+    config = get_server_config()
+    workers = config.workers
+    # one connection per worker is kept for LISTEN, the pool gets the rest
+    db_pool = split_pool_budget(config.DB_POOL_BUDGET, workers) - 1
+    os.environ["DB_POOL_SIZE"] = str(db_pool)
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    os.environ["DB_ECHO"] = "false"
+    os.environ["AWS_S3_MAX_POOL_CONNECTIONS"] = str(
+        split_pool_budget(config.S3_POOL_BUDGET, workers)
+    )
+    uvicorn.run(
+        "src.presentation.main:main",
+        factory=True,
+        host=config.WEB_HOST,
+        port=config.WEB_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_graceful_shutdown=config.GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,202 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import pstats
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from fastapi import FastAPI
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.app.uuid7 import uuid7
+
+SIGNATURE_HEADER = b"x-profile-signature"
+
+
+class ProfilingConfig(BaseSettings):
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SECRET: str | None = None
+    PROFILE_RING_SIZE: int = 50
+
+    @property
+    def enabled(self) -> bool:
+        return self.PROFILE_SAMPLE_RATE > 0 or self.PROFILE_SECRET is not None
+
+    model_config = SettingsConfigDict(
+        env_file=".env.non-dev", env_file_encoding="utf-8", extra="ignore"
+    )
+
+
+@lru_cache
+def get_profiling_config() -> ProfilingConfig:
+    return ProfilingConfig()
+
+
+@dataclass
+class Profile:
+    method: str
+    path: str
+    id: str = field(default_factory=lambda: str(uuid7()))
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    status: int | None = None
+    sql: list[tuple[float, str]] = field(default_factory=list)
+    s3: list[tuple[float, str]] = field(default_factory=list)
+    stats: str = ""
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            "sql_statements": len(self.sql),
+            "sql_time": sum(d for d, _ in self.sql),
+            "s3_calls": len(self.s3),
+            "s3_time": sum(d for d, _ in self.s3),
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"{self.method} {self.path} -> {self.status} in {self.duration * 1000:.1f} ms",
+            "",
+            f"SQL ({len(self.sql)} statements)",
+            *(f"{d * 1000:9.2f} ms  {s}" for d, s in self.sql),
+            "",
+            f"S3 ({len(self.s3)} calls)",
+            *(f"{d * 1000:9.2f} ms  {op}" for d, op in self.s3),
+            "",
+            self.stats,
+        ]
+        return "\n".join(lines)
+
+
+current_profile: ContextVar[Profile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def sign(secret: str, method: str, path: str, expires: int) -> str:
+    """Value for the X-Profile-Signature header of a request to profile"""
+    message = f"{expires}:{method}:{path}".encode()
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"{expires}:{digest}"
+
+
+def _has_valid_signature(secret: str, scope: dict) -> bool:
+    for name, value in scope["headers"]:
+        if name != SIGNATURE_HEADER:
+            continue
+        expires, _, _ = value.decode().partition(":")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        expected = sign(secret, scope["method"], scope["path"], int(expires))
+        return hmac.compare_digest(expected, value.decode())
+    return False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None and conn.info.get("profile_started"):
+        started = conn.info["profile_started"].pop()
+        profile.sql.append((time.perf_counter() - started, statement))
+
+
+def _before_s3_call(model, context, **kwargs):
+    if current_profile.get() is not None:
+        context["profile_started"] = time.perf_counter()
+
+
+def _after_s3_call(model, context, **kwargs):
+    profile = current_profile.get()
+    if profile is not None and "profile_started" in context:
+        duration = time.perf_counter() - context["profile_started"]
+        profile.s3.append((duration, model.name))
+
+
+def install_sql_hooks() -> None:
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def install_s3_hooks(client: Any) -> None:
+    client.meta.events.register("before-call.s3", _before_s3_call)
+    client.meta.events.register("after-call.s3", _after_s3_call)
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests, or requests with a signed header.
+
+    cProfile sees everything the event loop runs while a request is being
+    profiled, so only one request is profiled at a time and concurrent
+    requests show up in its statistics.
+    """
+
+    def __init__(self, app: Any, config: ProfilingConfig, profiles: deque) -> None:
+        self.app = app
+        self.config = config
+        self.profiles = profiles
+        self._busy = False
+
+    def _wanted(self, scope: dict) -> bool:
+        if self._busy:
+            return False
+        if random.random() < self.config.PROFILE_SAMPLE_RATE:
+            return True
+        secret = self.config.PROFILE_SECRET
+        return secret is not None and _has_valid_signature(secret, scope)
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(method=scope["method"], path=scope["path"])
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        self._busy = True
+        token = current_profile.set(profile)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            profile.duration = time.perf_counter() - started
+            current_profile.reset(token)
+            self._busy = False
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            profile.stats = out.getvalue()
+            self.profiles.append(profile)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    config = get_profiling_config()
+    app.state.profiles = deque(maxlen=config.PROFILE_RING_SIZE)
+    if not config.enabled:
+        return
+    install_sql_hooks()
+    app.add_middleware(
+        ProfilingMiddleware, config=config, profiles=app.state.profiles
+    )
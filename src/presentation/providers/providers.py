@@ -1,11 +1,11 @@
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.infrastructure.database.factory import get_async_session
-from src.infrastructure.s3.factory import exist_bucket
+from src.infrastructure.database.factory import get_async_session, get_sessionmaker
 from src.presentation.providers.stub import Stub
 
 
 def setup_providers(app: FastAPI) -> None:
     app.dependency_overrides[Stub(AsyncSession)] = get_async_session
-    exist_bucket()
+    # for work that outlives the request or is shared between requests
+    app.dependency_overrides[Stub(async_sessionmaker)] = get_sessionmaker
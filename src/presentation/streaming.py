@@ -0,0 +1,118 @@
+import json
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is offered without it
+    zstandard = None
+
+# smaller bodies are sent as they are, compressing them saves next to nothing
+COMPRESS_THRESHOLD = 8 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+async def json_array(batches: AsyncIterator[list[Any]]) -> AsyncIterator[bytes]:
+    """Encode batches of items as one JSON array, a chunk per batch"""
+    separator = b"["
+    async with aclosing(batches):
+        async for batch in batches:
+            if not batch:
+                continue
+            # the encoded batch without its brackets, uuids as strings
+            yield separator + json.dumps(
+                batch, separators=(",", ":"), default=str
+            )[1:-1].encode()
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Content coding to compress with, zstd over gzip, None for identity"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        q = next((p[2:] for p in params if p.startswith("q=")), "1")
+        try:
+            if float(q) > 0:
+                accepted.add(coding.lower())
+        except ValueError:
+            continue
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding: str):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    # wbits 16 + 15 writes a gzip header and trailer
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+async def _chain(
+        head: list[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async with aclosing(rest):
+        for chunk in head:
+            yield chunk
+        async for chunk in rest:
+            yield chunk
+
+
+async def _compress(
+        chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    compressor = _compressor(encoding)
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            # the compressor holds back output until it has a block's worth
+            if data := compressor.compress(chunk):
+                yield data
+    yield compressor.flush()
+
+
+async def stream_json_array(
+        request: Request,
+        batches: AsyncIterator[list[Any]],
+        headers: dict[str, str]
+) -> Response:
+    """Response writing the items of batches as a JSON array as they come.
+
+    Chunks are read up to COMPRESS_THRESHOLD bytes first: a body ending
+    before that is sent whole and uncompressed, a longer one is streamed
+    through gzip or zstd when the client accepts them. A compressed body
+    gets a weak ETag, its bytes differ from the identity body.
+    """
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    chunks = json_array(batches)
+    head = []
+    size = 0
+    try:
+        async for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= COMPRESS_THRESHOLD:
+                break
+        else:
+            return Response(
+                b"".join(head), media_type="application/json", headers=headers
+            )
+    except BaseException:
+        await chunks.aclose()
+        raise
+
+    body = _chain(head, chunks)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        body = _compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers and not headers["ETag"].startswith("W/"):
+            headers["ETag"] = "W/" + headers["ETag"]
+    return StreamingResponse(body, media_type="application/json", headers=headers)
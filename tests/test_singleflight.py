@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.app.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class Backend:
+    def __init__(self, result: object = "post") -> None:
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def fetch(self) -> object:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def start(flights: SingleFlight, backend: Backend, n: int) -> list[asyncio.Task]:
+    tasks = [asyncio.create_task(flights.do("key", backend.fetch)) for _ in range(n)]
+    # let every caller join the flight before the backend answers
+    await asyncio.sleep(0)
+    return tasks
+
+
+async def test_concurrent_calls_share_one_backend_call():
+    flights, backend = SingleFlight(), Backend()
+    tasks = await start(flights, backend, 100)
+    backend.release.set()
+
+    assert await asyncio.gather(*tasks) == ["post"] * 100
+    assert backend.calls == 1
+    assert flights.calls == 1
+    assert len(flights) == 0
+
+
+async def test_cancelled_leader_does_not_cancel_the_others():
+    flights, backend = SingleFlight(), Backend()
+    leader, *others = await start(flights, backend, 10)
+    leader.cancel()
+    await asyncio.sleep(0)
+    backend.release.set()
+
+    assert await asyncio.gather(*others) == ["post"] * 9
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert backend.calls == 1
+    assert not backend.cancelled
+
+
+async def test_call_is_cancelled_when_every_caller_leaves():
+    flights, backend = SingleFlight(), Backend()
+    tasks = await start(flights, backend, 3)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert backend.cancelled
+    assert len(flights) == 0
+
+    backend.release.set()
+    assert await flights.do("key", backend.fetch) == "post"
+    assert backend.calls == 2
+
+
+async def test_error_reaches_every_caller_and_is_not_cached():
+    flights, backend = SingleFlight(), Backend(LookupError("no post"))
+    tasks = await start(flights, backend, 5)
+    backend.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, LookupError) for result in results)
+    assert backend.calls == 1
+    assert len(flights) == 0
+
+    backend.result = "post"
+    assert await flights.do("key", backend.fetch) == "post"
+    assert backend.calls == 2
+
+
+async def test_full_flight_starts_a_new_one():
+    flights, backend = SingleFlight(max_waiters=2), Backend()
+    tasks = await start(flights, backend, 5)
+    backend.release.set()
+
+    assert await asyncio.gather(*tasks) == ["post"] * 5
+    assert backend.calls == 3
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+from asyncpg import PostgresError
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from benchmarks.sql_budget import BUDGET_FILE, compare, measure
+from src.infrastructure.database.factory import dispose_engine, get_engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def database_available() -> bool:
+    load_dotenv()
+    try:
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    # asyncpg raises connect errors unwrapped, a wrong database name or
+    # password is a PostgresError rather than a DBAPIError
+    except (ValidationError, OSError, DBAPIError, PostgresError):
+        return False
+    finally:
+        await dispose_engine()
+    return True
+
+
+async def test_routes_stay_within_sql_budget():
+    if not await database_available():
+        pytest.skip("needs a migrated Postgres database, see DB_* variables")
+    usage = await measure()
+    assert not compare(usage, json.loads(BUDGET_FILE.read_text()))
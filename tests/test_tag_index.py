@@ -0,0 +1,63 @@
+import asyncio
+import heapq
+import random
+
+import pytest
+
+from src.app import tag
+from src.app.tag import TagIndex
+
+pytestmark = pytest.mark.anyio
+
+
+class Repo:
+    """Tag counts streamed until released, like a slow database read"""
+
+    def __init__(self, counts: dict[str, int]) -> None:
+        self.counts = counts
+        self.release = asyncio.Event()
+
+    async def stream_tag_counts(self):
+        await self.release.wait()
+        for item in self.counts.items():
+            yield item
+
+
+def expected(counts: dict[str, int], prefix: str, limit: int) -> list[int]:
+    matches = [count for name, count in counts.items() if name.startswith(prefix)]
+    return heapq.nlargest(limit, matches)
+
+
+def suggested(index: TagIndex, prefix: str, limit: int) -> list[int]:
+    return [tag.posts for tag in index.suggest(prefix, limit)]
+
+
+async def test_adds_during_a_load_are_replayed():
+    index = TagIndex()
+    repo = Repo({"python": 3, "rust": 1})
+    load = asyncio.create_task(index.load(repo))
+    await asyncio.sleep(0)
+    index.add(["python", "go"])
+    repo.release.set()
+    await load
+    assert index.counts == {"python": 4, "rust": 1, "go": 1}
+    assert [t.name for t in index.suggest("", 3)] == ["python", "rust", "go"]
+
+
+async def test_tops_follow_added_posts(monkeypatch):
+    monkeypatch.setattr(tag, "SCAN_LIMIT", 8)
+    monkeypatch.setattr(tag, "TOP_K", 5)
+    rng = random.Random(0)
+    names = {"".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(60)}
+    counts = {name: rng.randint(0, 5) for name in names}
+    index = TagIndex()
+    repo = Repo(dict(counts))
+    repo.release.set()
+    await index.load(repo)
+    assert index.top
+    for _ in range(500):
+        name = "".join(rng.choices("abcd", k=rng.randint(1, 4)))
+        index.add([name])
+        counts[name] = counts.get(name, 0) + 1
+    for prefix in {name[:end] for name in counts for end in range(3)}:
+        assert suggested(index, prefix, 5) == expected(counts, prefix, 5)